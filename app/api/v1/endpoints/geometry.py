@@ -1,18 +1,119 @@
 """
 API endpoint for retrieving property geometry data for map visualization.
 """
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func, text
 from typing import Optional
 
 from app.database import get_db
-from app.models.property import Property
+from app.api.responses import ORJSONResponse
 from app.models.zoning import ZoningDistrict
 from app.models.landmark import Landmark
+from app.services.cache import response_cache, geometry_cache_key, nearby_geometry_cache_key
 
 router = APIRouter()
 
+# Statements are built once at import and reused for every request
+
+# Geometry, centroid and bounding box in a single round-trip
+PROPERTY_GEOMETRY_SQL = text("""
+    SELECT
+        ST_AsGeoJSON(geometry) as geom,
+        ST_X(ST_Centroid(geometry)) as lon,
+        ST_Y(ST_Centroid(geometry)) as lat,
+        ST_AsGeoJSON(ST_Envelope(geometry)) as bbox
+    FROM properties
+    WHERE bbl = :bbl
+""")
+
+# Property geometry with nearby landmarks and intersecting zoning districts in
+# a single round-trip. The property's stored geography and a degree-expanded
+# search box are read once in the CTE; 110 km per degree under-estimates both axes, so
+# the box never clips a match. Zoning districts are matched against their small
+# indexed subdivided pieces rather than the full district polygons. The two
+# arrays are returned as JSON text so they can be embedded in the response
+# without being decoded into Python objects.
+_NEARBY_GEOMETRY_TEMPLATE = """
+    WITH p AS (
+        SELECT
+            geometry,
+            geog AS g,
+            ST_Expand(
+                geometry,
+                :distance_meters / 110000.0 / cos(radians(ST_Y(ST_Centroid(geometry)))),
+                :distance_meters / 110000.0
+            ) AS search_box
+        FROM properties
+        WHERE bbl = :bbl
+    )
+    SELECT
+        ST_AsGeoJSON(p.geometry) as geom,
+        (
+            SELECT COALESCE(
+                json_agg(
+                    json_build_object(
+                        'id', nl.id,
+                        'name', nl.name,
+                        'geometry', nl.geom,
+                        'distance_feet', round(nl.distance_feet::numeric, 2)
+                    )
+                    ORDER BY nl.distance_feet
+                ),
+                '[]'::json
+            )
+            FROM (
+                SELECT
+                    l.id,
+                    l.name,
+                    ST_AsGeoJSON(l.geometry) as geom,
+                    {landmark_distance} * 3.28084 as distance_feet
+                FROM landmarks l
+                WHERE {landmark_filter}
+            ) nl
+        )::text as landmarks,
+        (
+            SELECT COALESCE(
+                json_agg(
+                    json_build_object(
+                        'id', zd.id,
+                        'zoning_code', zd.zoning_code,
+                        'geometry', ST_AsGeoJSON(zd.geometry)
+                    )
+                ),
+                '[]'::json
+            )
+            FROM zoning_districts zd
+            WHERE zd.id IN (
+                SELECT zds.zoning_district_id
+                FROM zoning_district_subdivisions zds
+                WHERE zds.geometry && p.geometry
+                  AND ST_Intersects(zds.geometry, p.geometry)
+            )
+        )::text as zoning_districts
+    FROM p
+"""
+
+# Exact: the && prefilter uses the GiST index on landmarks.geometry, then
+# ST_DWithin/ST_Distance run on the stored geography column for the candidates
+NEARBY_GEOMETRY_PRECISE_SQL = text(_NEARBY_GEOMETRY_TEMPLATE.format(
+    landmark_distance="ST_Distance(l.geog, p.g)",
+    landmark_filter=(
+        "l.geometry && p.search_box\n"
+        "                  AND ST_DWithin(l.geog, p.g, :distance_meters)"
+    ),
+))
+
+# Approximate: landmarks whose bounding box overlaps the search box, straight
+# from the GiST index on landmarks.geom_bbox. May include landmarks slightly
+# beyond distance_feet; distances are measured to the landmark bounding box.
+NEARBY_GEOMETRY_SQL = text(_NEARBY_GEOMETRY_TEMPLATE.format(
+    landmark_distance="ST_Distance(l.geom_bbox::geography, p.g)",
+    landmark_filter="l.geom_bbox && p.search_box",
+))
+
 
 @router.get("/properties/{bbl}/geometry")
 def get_property_geometry(
@@ -27,129 +128,82 @@ def get_property_geometry(
     - Center coordinates (centroid)
     - Bounding box
     """
-    property_obj = db.query(Property).filter(Property.bbl == bbl).first()
-    
-    if not property_obj:
-        raise HTTPException(status_code=404, detail="Property not found")
+    cache_key = geometry_cache_key(bbl)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
     
     try:
-        # Get geometry as GeoJSON
-        geom_result = db.execute(
-            text("SELECT ST_AsGeoJSON(geometry) as geom FROM properties WHERE bbl = :bbl"),
-            {"bbl": bbl}
-        ).fetchone()
-        
-        # Get centroid coordinates
-        centroid_result = db.execute(
-            text("SELECT ST_X(ST_Centroid(geometry)) as lon, ST_Y(ST_Centroid(geometry)) as lat FROM properties WHERE bbl = :bbl"),
+        # Geometry, centroid and bounding box in a single round-trip
+        row = db.execute(
+            PROPERTY_GEOMETRY_SQL,
             {"bbl": bbl}
         ).fetchone()
-        
-        # Get bounding box
-        bbox_result = db.execute(
-            text("SELECT ST_AsGeoJSON(ST_Envelope(geometry)) as bbox FROM properties WHERE bbl = :bbl"),
-            {"bbl": bbl}
-        ).fetchone()
-        
-        return {
-            "bbl": bbl,
-            "geometry": geom_result.geom if geom_result else None,
-            "center": {
-                "lon": float(centroid_result.lon) if centroid_result else None,
-                "lat": float(centroid_result.lat) if centroid_result else None,
-            },
-            "bbox": bbox_result.bbox if bbox_result else None,
-        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving geometry: {str(e)}")
+    
+    if row is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    
+    geom = row._mapping
+    response = ORJSONResponse({
+        "bbl": bbl,
+        "geometry": geom["geom"],
+        "center": {
+            "lon": float(geom["lon"]) if geom["lon"] is not None else None,
+            "lat": float(geom["lat"]) if geom["lat"] is not None else None,
+        },
+        "bbox": geom["bbox"],
+    })
+    response_cache.set(cache_key, response.body)
+    return response
 
 
 @router.get("/properties/{bbl}/nearby-geometry")
 def get_nearby_geometry(
     bbl: str,
     distance_feet: float = 150.0,
+    precise: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     Get geometry for property and nearby landmarks/zoning districts.
     
+    By default nearby landmarks are matched by bounding box, which is much
+    cheaper but may include landmarks slightly beyond distance_feet. Pass
+    precise=true for exact geodesic distance matching.
+    
     Returns:
     - Property geometry
     - Nearby landmark geometries
     - Intersecting zoning district geometries
     """
-    property_obj = db.query(Property).filter(Property.bbl == bbl).first()
-    
-    if not property_obj:
-        raise HTTPException(status_code=404, detail="Property not found")
+    cache_key = nearby_geometry_cache_key(bbl, distance_feet, precise)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
     
     try:
-        # Get property geometry
-        prop_geom = db.execute(
-            text("SELECT ST_AsGeoJSON(geometry) as geom FROM properties WHERE bbl = :bbl"),
-            {"bbl": bbl}
-        ).fetchone()
-        
-        # Get nearby landmarks
-        landmarks = db.execute(
-            text("""
-                SELECT 
-                    id,
-                    name,
-                    ST_AsGeoJSON(geometry) as geom,
-                    ST_Distance(
-                        ST_Transform(geometry::geography, 3857),
-                        (SELECT ST_Transform(geometry::geography, 3857) FROM properties WHERE bbl = :bbl)
-                    ) * 3.28084 as distance_feet
-                FROM landmarks
-                WHERE ST_DWithin(
-                    geometry::geography,
-                    (SELECT geometry::geography FROM properties WHERE bbl = :bbl),
-                    :distance_meters
-                )
-                ORDER BY distance_feet
-            """),
+        # Property, landmarks and zoning districts in one statement
+        row = db.execute(
+            NEARBY_GEOMETRY_PRECISE_SQL if precise else NEARBY_GEOMETRY_SQL,
             {"bbl": bbl, "distance_meters": distance_feet * 0.3048}
-        ).fetchall()
-        
-        # Get intersecting zoning districts
-        zoning = db.execute(
-            text("""
-                SELECT 
-                    zd.id,
-                    zd.zoning_code,
-                    ST_AsGeoJSON(zd.geometry) as geom
-                FROM zoning_districts zd
-                WHERE ST_Intersects(
-                    zd.geometry,
-                    (SELECT geometry FROM properties WHERE bbl = :bbl)
-                )
-            """),
-            {"bbl": bbl}
-        ).fetchall()
-        
-        return {
-            "property": {
-                "bbl": bbl,
-                "geometry": prop_geom.geom if prop_geom else None,
-            },
-            "landmarks": [
-                {
-                    "id": str(lm.id),
-                    "name": lm.name,
-                    "geometry": lm.geom,
-                    "distance_feet": round(float(lm.distance_feet), 2),
-                }
-                for lm in landmarks
-            ],
-            "zoning_districts": [
-                {
-                    "id": str(zd.id),
-                    "zoning_code": zd.zoning_code,
-                    "geometry": zd.geom,
-                }
-                for zd in zoning
-            ],
-        }
+        ).fetchone()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving geometry: {str(e)}")
+    
+    if row is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    
+    # Landmarks and zoning districts arrive as serialized JSON arrays, already
+    # shaped for the response, and are written into the body verbatim
+    response = ORJSONResponse({
+        "property": {
+            "bbl": bbl,
+            "geometry": row.geom,
+        },
+        "landmarks": orjson.Fragment(row.landmarks),
+        "zoning_districts": orjson.Fragment(row.zoning_districts),
+    })
+    response_cache.set(cache_key, response.body)
+    return response
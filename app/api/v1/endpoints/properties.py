@@ -1,13 +1,21 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import Optional
+from typing import List, Optional
 
+from app.config import settings
 from app.database import get_db
+from app.models.property import Property
 from app.services.spatial import SpatialService
-from app.services.geocoding import GeocodingService, GeocodingError
-from app.schemas.property import PropertyResponse, PropertyLookupQuery
-from app.schemas.response import PropertyLookupResponse
+from app.services.geocoding import geocoding_service, GeocodingError
+from app.services.cache import lookup_cache, address_cache_key
+from app.schemas.property import (
+    PropertyResponse, PropertyLookupQuery, PropertyBulkLookupRequest, ZoningDistrictInfo, NearbyLandmarkInfo
+)
+from app.schemas.response import PropertyLookupResponse, PropertyBulkLookupResponse
 from app.utils.postgis import create_point
 
 router = APIRouter()
@@ -37,91 +45,155 @@ async def lookup_property(
         )
     
     spatial_service = SpatialService(db)
-    property_obj = None
+    context = None
     
     try:
         # Try BBL lookup first (most direct)
         if bbl:
-            property_obj = spatial_service.find_property_by_bbl(bbl)
+            context = await run_in_threadpool(spatial_service.get_property_with_context, bbl, distance_feet=150.0)
         
-        # Try address lookup
-        elif address:
-            # First try direct address match
-            property_obj = spatial_service.find_property_by_address(address)
-            
-            # If not found, geocode and search by coordinates
-            if not property_obj:
-                geocoding_service = GeocodingService()
+        else:
+            # Try address lookup
+            if address:
                 normalized_address = geocoding_service.normalize_address(address)
-                lat, lon = await geocoding_service.geocode(normalized_address)
-                property_obj = spatial_service.find_property_by_coordinates(lat, lon)
-        
-        # Try coordinate lookup
-        elif lat is not None and lon is not None:
-            property_obj = spatial_service.find_property_by_coordinates(lat, lon)
+                address_key = address_cache_key(normalized_address)
+                
+                # Reuse the BBL this address resolved to before
+                cached_bbl = await lookup_cache.aget(address_key)
+                if cached_bbl is not None:
+                    context = await run_in_threadpool(
+                        spatial_service.get_property_with_context,
+                        cached_bbl.decode(),
+                        distance_feet=150.0
+                    )
+                
+                if not context:
+                    # First try direct address match
+                    context = await run_in_threadpool(
+                        spatial_service.get_property_with_context_by_address,
+                        address,
+                        distance_feet=150.0
+                    )
+                    
+                    # If not found, geocode and search by coordinates
+                    if not context:
+                        lat, lon = await geocoding_service.geocode(normalized_address)
+                        context = await run_in_threadpool(
+                            spatial_service.get_property_with_context_at,
+                            lat,
+                            lon,
+                            distance_feet=150.0
+                        )
+                    
+                    if context:
+                        await lookup_cache.aset(
+                            address_key,
+                            context[0].bbl.encode(),
+                            ttl_seconds=settings.ADDRESS_CACHE_TTL_SECONDS
+                        )
+            
+            # Try coordinate lookup
+            elif lat is not None and lon is not None:
+                context = await run_in_threadpool(
+                    spatial_service.get_property_with_context_at,
+                    lat,
+                    lon,
+                    distance_feet=150.0
+                )
         
-        if not property_obj:
+        if not context:
             return PropertyLookupResponse(
                 property=None,
                 error="Property not found"
             )
         
-        # Get zoning districts
-        zoning_districts = spatial_service.get_property_zoning_districts(property_obj)
-        if not zoning_districts:
-            # Fallback to spatial intersection if no relationships exist
-            zoning_districts = spatial_service.get_zoning_districts(property_obj.geometry)
+        return PropertyLookupResponse(property=_build_property_response(*context))
+    
+    except GeocodingError as e:
+        raise HTTPException(status_code=400, detail=f"Geocoding error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post("/bulk-lookup", response_model=PropertyBulkLookupResponse)
+async def bulk_lookup_properties(
+    request: PropertyBulkLookupRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Look up several properties by address in one request.
+    
+    Addresses without a cached or direct match are geocoded concurrently
+    instead of one after another. Results are returned in request order.
+    """
+    spatial_service = SpatialService(db)
+    normalized_addresses = [geocoding_service.normalize_address(address) for address in request.addresses]
+    contexts: List[Optional[tuple]] = [None] * len(request.addresses)
+    resolved = []
+    
+    # Database work (and the cache probes that go with it) runs in the
+    # threadpool, one call per phase, so the event loop stays free while the
+    # queries run; cache writes on the loop use the non-blocking client
+    def match_addresses() -> List[int]:
+        # Cached BBLs first, in one query
+        cached_bbls = {}
+        for i, normalized_address in enumerate(normalized_addresses):
+            cached_bbl = lookup_cache.get(address_cache_key(normalized_address))
+            if cached_bbl is not None:
+                cached_bbls[i] = cached_bbl.decode()
+        found = spatial_service.get_properties_with_context(list(cached_bbls.values()), distance_feet=150.0)
         
-        # Get nearby landmarks
-        nearby_landmarks = spatial_service.find_nearby_landmarks(
-            property_obj.geometry,
-            distance_feet=150.0
-        )
+        # Then direct address matches
+        unmatched = []
+        for i, address in enumerate(request.addresses):
+            if cached_bbls.get(i) in found:
+                contexts[i] = found[cached_bbls[i]]
+                continue
+            
+            contexts[i] = spatial_service.get_property_with_context_by_address(address, distance_feet=150.0)
+            if contexts[i]:
+                resolved.append(i)
+            else:
+                unmatched.append(i)
+        return unmatched
+    
+    def match_coordinates(unmatched: List[int], coordinates: List[Optional[tuple]]) -> None:
+        # Point-in-polygon for all geocoded addresses in one query, then their context in another
+        located = [(i, coords) for i, coords in zip(unmatched, coordinates) if coords is not None]
+        bbls = spatial_service.find_bbls_by_coordinates([coords for _, coords in located])
+        found = spatial_service.get_properties_with_context([bbl for bbl in bbls if bbl], distance_feet=150.0)
         
-        # Build response
-        from app.schemas.property import ZoningDistrictInfo, NearbyLandmarkInfo
+        for (i, _), bbl in zip(located, bbls):
+            if bbl in found:
+                contexts[i] = found[bbl]
+                resolved.append(i)
+    
+    try:
+        unmatched = await run_in_threadpool(match_addresses)
         
-        zoning_info = [
-            ZoningDistrictInfo(
-                code=zd.zoning_code,
-                type=zd.zoning_type.value,
-                is_primary=is_primary
-            )
-            for zd, is_primary in zoning_districts
-        ]
+        # Geocode the rest in parallel and search by coordinates
+        coordinates = await geocoding_service.geocode_many(
+            [normalized_addresses[i] for i in unmatched]
+        )
+        await run_in_threadpool(match_coordinates, unmatched, coordinates)
         
-        landmark_info = [
-            NearbyLandmarkInfo(
-                name=lm.name,
-                landmark_type=lm.landmark_type.value,
-                distance_feet=round(distance_ft, 2)
+        await asyncio.gather(*[
+            lookup_cache.aset(
+                address_cache_key(normalized_addresses[i]),
+                contexts[i][0].bbl.encode(),
+                ttl_seconds=settings.ADDRESS_CACHE_TTL_SECONDS
             )
-            for lm, distance_ft in nearby_landmarks
-        ]
+            for i in resolved
+        ])
         
-        property_response = PropertyResponse(
-            id=property_obj.id,
-            bbl=property_obj.bbl,
-            address=property_obj.address,
-            borough=property_obj.borough.value,
-            block=property_obj.block,
-            lot=property_obj.lot,
-            land_area=float(property_obj.land_area) if property_obj.land_area else None,
-            year_built=property_obj.year_built,
-            num_floors=property_obj.num_floors,
-            units_res=property_obj.units_res,
-            units_total=property_obj.units_total,
-            assessed_value=float(property_obj.assessed_value) if property_obj.assessed_value else None,
-            zoning_districts=zoning_info,
-            nearby_landmarks=landmark_info,
-            created_at=property_obj.created_at,
-            updated_at=property_obj.updated_at
-        )
+        results = [
+            PropertyLookupResponse(property=_build_property_response(*context))
+            if context else PropertyLookupResponse(property=None, error="Property not found")
+            for context in contexts
+        ]
         
-        return PropertyLookupResponse(property=property_response)
+        return PropertyBulkLookupResponse(results=results)
     
-    except GeocodingError as e:
-        raise HTTPException(status_code=400, detail=f"Geocoding error: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -137,44 +209,44 @@ def get_property_by_bbl(
     Returns detailed property information.
     """
     spatial_service = SpatialService(db)
-    property_obj = spatial_service.find_property_by_bbl(bbl)
+    context = spatial_service.get_property_with_context(bbl, distance_feet=150.0)
     
-    if not property_obj:
+    if not context:
         raise HTTPException(status_code=404, detail="Property not found")
     
-    # Get zoning districts
-    zoning_districts = spatial_service.get_property_zoning_districts(property_obj)
-    if not zoning_districts:
-        zoning_districts = spatial_service.get_zoning_districts(property_obj.geometry)
-    
-    # Get nearby landmarks
-    nearby_landmarks = spatial_service.find_nearby_landmarks(
-        property_obj.geometry,
-        distance_feet=150.0
-    )
-    
-    # Build response
-    from app.schemas.property import ZoningDistrictInfo, NearbyLandmarkInfo
+    return _build_property_response(*context)
+
+
+def _build_property_response(
+    property_obj: Property,
+    zoning_districts: List[dict],
+    nearby_landmarks: List[dict]
+) -> PropertyResponse:
+    """
+    Build the property response from SpatialService.get_property_with_context results.
     
+    The values come straight from typed database columns, so the models are
+    built with model_construct and skip field validation.
+    """
     zoning_info = [
-        ZoningDistrictInfo(
-            code=zd.zoning_code,
-            type=zd.zoning_type.value,
-            is_primary=is_primary
+        ZoningDistrictInfo.model_construct(
+            code=zd["code"],
+            type=zd["type"],
+            is_primary=zd["is_primary"]
         )
-        for zd, is_primary in zoning_districts
+        for zd in zoning_districts
     ]
     
     landmark_info = [
-        NearbyLandmarkInfo(
-            name=lm.name,
-            landmark_type=lm.landmark_type.value,
-            distance_feet=round(distance_ft, 2)
+        NearbyLandmarkInfo.model_construct(
+            name=lm["name"],
+            landmark_type=lm["landmark_type"],
+            distance_feet=round(lm["distance_feet"], 2)
         )
-        for lm, distance_ft in nearby_landmarks
+        for lm in nearby_landmarks
     ]
     
-    return PropertyResponse(
+    return PropertyResponse.model_construct(
         id=property_obj.id,
         bbl=property_obj.bbl,
         address=property_obj.address,
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from app.api.v1.endpoints import properties, geometry
+from app.api.responses import ORJSONResponse
 
 api_router = APIRouter()
 
@@ -12,5 +13,6 @@ api_router.include_router(
 api_router.include_router(
     geometry.router,
     prefix="",
-    tags=["geometry"]
+    tags=["geometry"],
+    default_response_class=ORJSONResponse
 )
@@ -1,4 +1,5 @@
-from pydantic_settings import BaseSettings
+from functools import cached_property, lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
 
 
@@ -16,6 +17,20 @@ class Settings(BaseSettings):
     # Geocoding
     GEOCODING_API_KEY: str = ""
     GEOCODING_PROVIDER: str = "nyc"  # Options: nyc, google
+    GEOCODING_CONCURRENCY: int = 10  # Max provider requests in flight for bulk lookups
+    
+    # Cache (Redis if REDIS_URL is set, otherwise in-process)
+    REDIS_URL: str = ""
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5  # Per-command; a slow Redis counts as a miss
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 0.5
+    CACHE_TTL_SECONDS: int = 86400
+    CACHE_MAX_ENTRIES: int = 1024  # In-process geometry payloads
+    LOOKUP_CACHE_MAX_ENTRIES: int = 100_000  # In-process address/geocode/coordinate keys
+    LOCAL_CACHE_MAX_TTL_SECONDS: int = 300  # In-process TTL cap: importers can only invalidate via Redis
+    ADDRESS_CACHE_TTL_SECONDS: int = 30 * 86400
+    GEOCODE_CACHE_TTL_SECONDS: int = 86400
+    GEOCODE_NOT_FOUND_TTL_SECONDS: int = 300
+    COORDINATE_CACHE_TTL_SECONDS: int = 30 * 86400
     
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
@@ -23,14 +38,22 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     
-    @property
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=True,
+        frozen=True,
+    )
+    
+    @cached_property
     def cors_origins_list(self) -> List[str]:
-        """Parse CORS origins from comma-separated string."""
+        """Parse CORS origins from comma-separated string (parsed once)."""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
 
 
-settings = Settings()
+@lru_cache()
+def get_settings() -> Settings:
+    """Return the process-wide settings instance (cached)."""
+    return Settings()
+
+
+settings = get_settings()
@@ -0,0 +1,164 @@
+"""
+Bulk-load helpers shared by the data importers.
+Streams batches through PostgreSQL COPY (or batched multi-row INSERTs where
+COPY is not available) instead of per-row ORM inserts.
+"""
+import csv
+import enum
+import io
+import json
+import uuid
+from typing import Any, Iterable, List, Sequence, Set
+
+from geoalchemy2 import WKBElement, WKTElement
+from psycopg2.extras import execute_values
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def format_copy_value(value: Any) -> Any:
+    """
+    Convert a Python value to its COPY (CSV) text representation.
+    
+    The same representation is used as a bind value for batched INSERTs, where
+    PostgreSQL parses it with the column type's input function just like COPY.
+    """
+    if value is None:
+        return None
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        # SQLAlchemy Enum columns store member names, not values
+        return value.name
+    if isinstance(value, WKBElement):
+        # Hex WKB; PostGIS accepts an EWKT-style SRID prefix in front of it
+        data = value.data if isinstance(value.data, str) else bytes(value.data).hex()
+        return data if value.extended else f"SRID={value.srid};{data}"
+    if isinstance(value, WKTElement):
+        return f"SRID={value.srid};{value.data}"
+    if isinstance(value, (list, tuple)):
+        items = (
+            '"' + str(item).replace("\\", "\\\\").replace('"', '\\"') + '"'
+            for item in value
+        )
+        return "{" + ",".join(items) + "}"
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+def fetch_existing_keys(
+    db: Session,
+    table: str,
+    column: str,
+    keys: Sequence[Any]
+) -> Set[Any]:
+    """
+    Return the subset of keys already present in table.column.
+    
+    Issues a single `= ANY(:keys)` query per call instead of one lookup per key.
+    """
+    if not keys:
+        return set()
+    result = db.execute(
+        text(f"SELECT {column} FROM {table} WHERE {column} = ANY(:keys)"),
+        {"keys": list(keys)}
+    )
+    return {row[0] for row in result}
+
+
+def copy_records(
+    db: Session,
+    table: str,
+    columns: List[str],
+    rows: Iterable[Sequence[Any]]
+) -> None:
+    """
+    Load rows into a table with COPY ... FROM STDIN.
+    
+    Runs on the session's connection, so the load is part of the current
+    transaction and is committed (or rolled back) with it.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([format_copy_value(value) for value in row])
+    buffer.seek(0)
+    
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def insert_records(
+    db: Session,
+    table: str,
+    columns: List[str],
+    rows: Iterable[Sequence[Any]],
+    page_size: int = 1000
+) -> None:
+    """
+    Load rows into a table with multi-row INSERTs (psycopg2 execute_values).
+    
+    Fallback for connections where COPY is not permitted (e.g. some poolers and
+    proxies); sends one INSERT per page_size rows instead of one per row.
+    """
+    values = [[format_copy_value(value) for value in row] for row in rows]
+    
+    cursor = db.connection().connection.cursor()
+    try:
+        execute_values(
+            cursor,
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s",
+            values,
+            page_size=page_size
+        )
+    finally:
+        cursor.close()
+
+
+def load_records(
+    db: Session,
+    table: str,
+    columns: List[str],
+    rows: Iterable[Sequence[Any]],
+    use_copy: bool = True
+) -> None:
+    """Load rows with COPY, or with batched INSERTs if use_copy is False."""
+    if use_copy:
+        copy_records(db, table, columns, rows)
+    else:
+        insert_records(db, table, columns, rows)
+
+
+def staged_update(
+    db: Session,
+    table: str,
+    key: str,
+    columns: List[str],
+    rows: Iterable[Sequence[Any]],
+    use_copy: bool = True
+) -> None:
+    """
+    Update existing rows matched on key from a bulk-loaded staging table.
+    
+    Rows are loaded into a temporary table with the same column types, then
+    applied with a single UPDATE ... FROM join.
+    """
+    staging = f"{table}_staging"
+    db.execute(text(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+    ))
+    load_records(db, staging, columns, rows, use_copy=use_copy)
+    
+    assignments = ", ".join(f"{column} = s.{column}" for column in columns if column != key)
+    db.execute(text(
+        f"UPDATE {table} t SET {assignments}, updated_at = now() "
+        f"FROM {staging} s WHERE t.{key} = s.{key}"
+    ))
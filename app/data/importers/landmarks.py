@@ -3,17 +3,34 @@ Landmark data importer.
 Imports NYC landmark data from Shapefile format.
 """
 import geopandas as gpd
+import pandas as pd
+import shapely
 from sqlalchemy.orm import Session
 from typing import Optional
 from tqdm import tqdm
 import logging
-from datetime import datetime
+import uuid
 
 from app.models.landmark import Landmark, LandmarkType
-from geoalchemy2 import WKTElement
+from app.data.importers.bulk import load_records, staged_update, fetch_existing_keys
+from app.services.cache import response_cache, NEARBY_GEOMETRY_PREFIX
 
 logger = logging.getLogger(__name__)
 
+# Source fields read from the file (alternate spellings included; missing ones are ignored)
+SOURCE_COLUMNS = [
+    "NAME", "LM_NAME", "LANDMARK_NAME", "DESIG_NAME",
+    "TYPE", "LM_TYPE", "LANDMARK_TYPE",
+    "DESIG_DATE", "DESIGNATION_DATE", "DATE_DESIG",
+]
+
+# Columns written by COPY, in the order produced by _extract_landmark_data
+COPY_COLUMNS = ["name", "landmark_type", "geometry", "designation_date"]
+
+# Designation date fields and formats, tried in order
+DATE_FIELDS = ["DESIG_DATE", "DESIGNATION_DATE", "DATE_DESIG"]
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%Y%m%d"]
+
 
 class LandmarkImporter:
     """Importer for landmark data."""
@@ -26,7 +43,8 @@ class LandmarkImporter:
         file_path: str,
         batch_size: int = 500,
         update_existing: bool = False,
-        dry_run: bool = False
+        dry_run: bool = False,
+        use_copy: bool = True
     ) -> dict:
         """
         Import landmark data from a file.
@@ -36,14 +54,15 @@ class LandmarkImporter:
             batch_size: Number of records to process before committing
             update_existing: If True, update existing records; if False, skip duplicates
             dry_run: If True, don't actually insert data
+            use_copy: If True, load with COPY; if False, use batched INSERTs
         
         Returns:
             Dictionary with import statistics
         """
         logger.info(f"Loading landmark data from {file_path}")
         
-        # Read GeoDataFrame
-        gdf = gpd.read_file(file_path)
+        # Read GeoDataFrame (pyogrio, only the fields the importer uses)
+        gdf = gpd.read_file(file_path, engine="pyogrio", columns=SOURCE_COLUMNS)
         
         # Ensure CRS is WGS84 (EPSG:4326)
         if gdf.crs is None:
@@ -67,48 +86,84 @@ class LandmarkImporter:
             logger.info("DRY RUN - No data will be inserted")
             return stats
         
+        # Geometry (Shapely geometries) converted to hex EWKB for PostGIS in one vectorized call
+        gdf["_wkb_hex"] = shapely.to_wkb(
+            shapely.set_srid(gdf.geometry.to_numpy(), 4326),
+            hex=True,
+            include_srid=True
+        )
+        
+        # Designation dates parsed for the whole file at once
+        gdf["_designation_date"] = self._extract_designation_dates(gdf)
+        
         # Process in batches
         for idx in tqdm(range(0, len(gdf), batch_size), desc="Importing landmarks"):
             batch = gdf.iloc[idx:idx + batch_size]
             
-            for _, row in batch.iterrows():
+            # Extract all records for the batch, keeping the first row per name
+            records = {}
+            for row in batch.to_dict("records"):
                 try:
                     # Extract landmark name
                     name = self._extract_name(row)
-                    if not name:
+                    if not name or name in records:
                         stats["skipped"] += 1
                         continue
                     
-                    # Check if landmark exists (by name - could be improved with unique ID)
-                    existing = self.db.query(Landmark).filter(
-                        Landmark.name == name
-                    ).first()
-                    
-                    if existing and not update_existing:
-                        stats["skipped"] += 1
-                        continue
-                    
-                    # Extract landmark data
-                    landmark_data = self._extract_landmark_data(row, name)
-                    
-                    if existing and update_existing:
-                        # Update existing landmark
-                        for key, value in landmark_data.items():
-                            setattr(existing, key, value)
-                        stats["updated"] += 1
-                    else:
-                        # Create new landmark
-                        landmark = Landmark(**landmark_data)
-                        self.db.add(landmark)
-                        stats["inserted"] += 1
+                    records[name] = self._extract_landmark_data(row, name)
                 
                 except Exception as e:
                     logger.error(f"Error processing landmark: {e}")
                     stats["errors"] += 1
                     continue
             
-            # Commit batch
-            self.db.commit()
+            if not records:
+                continue
+            
+            # Check which landmarks already exist (by name - could be improved with unique ID)
+            existing = fetch_existing_keys(
+                self.db, Landmark.__tablename__, "name", list(records)
+            )
+            
+            new_records = [data for name, data in records.items() if name not in existing]
+            updated_records = [data for name, data in records.items() if name in existing]
+            
+            try:
+                if new_records:
+                    load_records(
+                        self.db,
+                        Landmark.__tablename__,
+                        ["id"] + COPY_COLUMNS,
+                        ([uuid.uuid4()] + [data[c] for c in COPY_COLUMNS] for data in new_records),
+                        use_copy=use_copy
+                    )
+                
+                if updated_records and update_existing:
+                    staged_update(
+                        self.db,
+                        Landmark.__tablename__,
+                        "name",
+                        COPY_COLUMNS,
+                        ([data[c] for c in COPY_COLUMNS] for data in updated_records),
+                        use_copy=use_copy
+                    )
+                
+                # Commit batch
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"Error importing landmark batch: {e}")
+                self.db.rollback()
+                stats["errors"] += len(records)
+                continue
+            
+            stats["inserted"] += len(new_records)
+            if update_existing:
+                stats["updated"] += len(updated_records)
+            else:
+                stats["skipped"] += len(updated_records)
+        
+        # Cached nearby-geometry payloads include landmarks
+        response_cache.delete_prefix(NEARBY_GEOMETRY_PREFIX)
         
         logger.info(f"Import complete: {stats}")
         return stats
@@ -122,21 +177,15 @@ class LandmarkImporter:
         return None
     
     def _extract_landmark_data(self, row, name: str) -> dict:
-        """Extract landmark data from GeoDataFrame row."""
+        """Extract landmark data from a GeoDataFrame record."""
         # Determine landmark type
         landmark_type = self._determine_landmark_type(row)
         
-        # Extract designation date
-        designation_date = self._extract_designation_date(row)
-        
-        # Get geometry
-        geometry = row.geometry
-        
         return {
             "name": name,
             "landmark_type": landmark_type,
-            "geometry": WKTElement(geometry.wkt, srid=4326),  # Convert to WKT for PostGIS
-            "designation_date": designation_date
+            "geometry": row["_wkb_hex"],  # Precomputed hex EWKB
+            "designation_date": row["_designation_date"]  # Precomputed date
         }
     
     def _determine_landmark_type(self, row) -> LandmarkType:
@@ -152,19 +201,26 @@ class LandmarkImporter:
         else:
             return LandmarkType.INDIVIDUAL
     
-    def _extract_designation_date(self, row) -> Optional[datetime]:
-        """Extract designation date from row data."""
-        # Common field names for designation date
-        for field in ["DESIG_DATE", "DESIGNATION_DATE", "DATE_DESIG"]:
-            if field in row and row[field]:
-                try:
-                    date_str = str(row[field])
-                    # Try various date formats
-                    for fmt in ["%Y-%m-%d", "%m/%d/%Y", "%Y%m%d"]:
-                        try:
-                            return datetime.strptime(date_str, fmt).date()
-                        except ValueError:
-                            continue
-                except Exception:
-                    continue
-        return None
+    def _extract_designation_dates(self, gdf: gpd.GeoDataFrame) -> pd.Series:
+        """
+        Extract designation dates for the whole GeoDataFrame.
+        
+        Each date field and format is parsed as a column, and a row takes the
+        first one that parses. Rows without a parseable date get None.
+        """
+        dates = pd.Series(pd.NaT, index=gdf.index, dtype="datetime64[ns]")
+        for field in DATE_FIELDS:
+            if field not in gdf.columns:
+                continue
+            
+            values = gdf[field]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                # Date fields read as datetimes by the driver
+                dates = dates.fillna(values.dt.tz_localize(None) if values.dt.tz else values)
+                continue
+            
+            values = values.astype("string").str.strip()
+            for fmt in DATE_FORMATS:
+                dates = dates.fillna(pd.to_datetime(values, format=fmt, errors="coerce"))
+        
+        return dates.dt.date.astype(object).where(dates.notna(), None)
@@ -3,16 +3,57 @@ MapPLUTO data importer.
 Imports NYC MapPLUTO property data from GeoJSON or Shapefile format.
 """
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from typing import Optional
 from tqdm import tqdm
 import logging
+import uuid
 
 from app.models.property import Property, Borough
-from geoalchemy2 import WKTElement
+from app.data.importers.bulk import load_records, staged_update, fetch_existing_keys
+from app.services.cache import (
+    response_cache, lookup_cache, geometry_cache_key,
+    NEARBY_GEOMETRY_PREFIX, COORDINATE_PREFIX, ADDRESS_PREFIX,
+)
 
 logger = logging.getLogger(__name__)
 
+# Columns written by COPY, in the order produced by _extract_property_data
+COPY_COLUMNS = [
+    "bbl", "address", "borough", "block", "lot", "geometry",
+    "land_area", "year_built", "num_floors", "units_res", "units_total",
+    "assessed_value", "zoning_districts",
+]
+
+# Source fields read from the file (alternate spellings included; missing ones are ignored)
+SOURCE_COLUMNS = [
+    "BBL", "bbl", "Borough", "borough", "BOROCODE", "Block", "block", "Lot", "lot",
+    "Address", "address", "HouseNum", "house_num", "Street", "street",
+    "LotArea", "lot_area", "YearBuilt", "year_built", "NumFloors", "num_floors",
+    "UnitsRes", "units_res", "UnitsTotal", "units_total", "AssessTot", "assess_tot",
+    "ZoneDist1", "ZoneDist2", "ZoneDist3", "ZoneDist4",
+]
+
+# Borough code (1=Manhattan, 2=Bronx, 3=Brooklyn, 4=Queens, 5=Staten Island)
+BOROUGH_CODES = {
+    "1": "1", "MANHATTAN": "1", "MN": "1",
+    "2": "2", "BRONX": "2", "BX": "2",
+    "3": "3", "BROOKLYN": "3", "BK": "3", "KINGS": "3",
+    "4": "4", "QUEENS": "4", "QN": "4",
+    "5": "5", "STATEN ISLAND": "5", "SI": "5", "RICHMOND": "5"
+}
+
+BOROUGH_ENUMS = {
+    "1": Borough.MANHATTAN,
+    "2": Borough.BRONX,
+    "3": Borough.BROOKLYN,
+    "4": Borough.QUEENS,
+    "5": Borough.STATEN_ISLAND
+}
+
 
 class MapPLUTOImporter:
     """Importer for MapPLUTO property data."""
@@ -25,7 +66,8 @@ class MapPLUTOImporter:
         file_path: str,
         batch_size: int = 1000,
         update_existing: bool = False,
-        dry_run: bool = False
+        dry_run: bool = False,
+        use_copy: bool = True
     ) -> dict:
         """
         Import MapPLUTO data from a file.
@@ -35,14 +77,15 @@ class MapPLUTOImporter:
             batch_size: Number of records to process before committing
             update_existing: If True, update existing records; if False, skip duplicates
             dry_run: If True, don't actually insert data
+            use_copy: If True, load with COPY; if False, use batched INSERTs
         
         Returns:
             Dictionary with import statistics
         """
         logger.info(f"Loading MapPLUTO data from {file_path}")
         
-        # Read GeoDataFrame
-        gdf = gpd.read_file(file_path)
+        # Read GeoDataFrame (pyogrio, only the fields the importer uses)
+        gdf = gpd.read_file(file_path, engine="pyogrio", columns=SOURCE_COLUMNS)
         
         # Ensure CRS is WGS84 (EPSG:4326)
         if gdf.crs is None:
@@ -66,167 +109,187 @@ class MapPLUTOImporter:
             logger.info("DRY RUN - No data will be inserted")
             return stats
         
+        # Extract property columns for the whole file at once
+        properties = self._extract_property_frame(gdf)
+        
+        # BBLs of updated properties, whose cache entries are dropped after the import
+        updated_bbls = []
+        
         # Process in batches
-        for idx in tqdm(range(0, len(gdf), batch_size), desc="Importing properties"):
-            batch = gdf.iloc[idx:idx + batch_size]
+        for idx in tqdm(range(0, len(properties), batch_size), desc="Importing properties"):
+            batch = properties.iloc[idx:idx + batch_size]
+            
+            # Rows with unparseable block/lot
+            invalid = batch["_invalid"]
+            stats["errors"] += int(invalid.sum())
+            batch = batch[~invalid]
+            
+            # Rows without a BBL, or repeating one within the batch
+            keep = batch["bbl"].notna() & ~batch["bbl"].duplicated()
+            stats["skipped"] += int((~keep).sum())
+            batch = batch[keep]
+            
+            if batch.empty:
+                continue
+            
+            # Check which properties already exist with a single query
+            existing = fetch_existing_keys(
+                self.db, Property.__tablename__, "bbl", batch["bbl"].tolist()
+            )
+            is_existing = batch["bbl"].isin(existing)
+            
+            # None instead of NaN/NA so COPY writes NULL
+            values = batch[COPY_COLUMNS].astype(object)
+            values = values.where(values.notna(), None)
+            new_records = values[~is_existing]
+            updated_records = values[is_existing]
             
-            for _, row in batch.iterrows():
-                try:
-                    # Extract BBL
-                    bbl = self._extract_bbl(row)
-                    if not bbl:
-                        stats["skipped"] += 1
-                        continue
-                    
-                    # Check if property exists
-                    existing = self.db.query(Property).filter(Property.bbl == bbl).first()
-                    
-                    if existing and not update_existing:
-                        stats["skipped"] += 1
-                        continue
-                    
-                    # Extract property data
-                    property_data = self._extract_property_data(row)
-                    
-                    if existing and update_existing:
-                        # Update existing property
-                        for key, value in property_data.items():
-                            setattr(existing, key, value)
-                        stats["updated"] += 1
-                    else:
-                        # Create new property
-                        property_obj = Property(**property_data)
-                        self.db.add(property_obj)
-                        stats["inserted"] += 1
+            try:
+                if not new_records.empty:
+                    load_records(
+                        self.db,
+                        Property.__tablename__,
+                        ["id"] + COPY_COLUMNS,
+                        ((uuid.uuid4(),) + row for row in new_records.itertuples(index=False, name=None)),
+                        use_copy=use_copy
+                    )
                 
-                except Exception as e:
-                    logger.error(f"Error processing property: {e}")
-                    stats["errors"] += 1
-                    continue
+                if not updated_records.empty and update_existing:
+                    staged_update(
+                        self.db,
+                        Property.__tablename__,
+                        "bbl",
+                        COPY_COLUMNS,
+                        updated_records.itertuples(index=False, name=None),
+                        use_copy=use_copy
+                    )
+                
+                # Commit batch
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"Error importing property batch: {e}")
+                self.db.rollback()
+                stats["errors"] += len(batch)
+                continue
             
-            # Commit batch
-            self.db.commit()
+            stats["inserted"] += len(new_records)
+            if update_existing:
+                stats["updated"] += len(updated_records)
+                updated_bbls.extend(updated_records["bbl"])
+            else:
+                stats["skipped"] += len(updated_records)
+        
+        # Drop cached geometry payloads for the updated properties, and the
+        # coordinate/address -> BBL mappings (an address may now resolve to
+        # a different parcel that still exists), once for the whole import.
+        # Only reaches the API server's cache through Redis; without REDIS_URL
+        # its in-process entries expire within LOCAL_CACHE_MAX_TTL_SECONDS instead
+        if updated_bbls:
+            response_cache.delete(*[geometry_cache_key(bbl) for bbl in updated_bbls])
+            response_cache.delete_prefix(NEARBY_GEOMETRY_PREFIX)
+            lookup_cache.delete_prefix(COORDINATE_PREFIX)
+            lookup_cache.delete_prefix(ADDRESS_PREFIX)
         
         logger.info(f"Import complete: {stats}")
         return stats
     
-    def _extract_bbl(self, row) -> Optional[str]:
-        """Extract BBL from row data."""
-        # MapPLUTO typically has BBL field
-        if "BBL" in row:
-            bbl = str(row["BBL"])
-        elif "bbl" in row:
-            bbl = str(row["bbl"])
-        else:
-            # Try to construct from borough, block, lot
-            borough_code = self._get_borough_code(row)
-            block = row.get("Block", row.get("block"))
-            lot = row.get("Lot", row.get("lot"))
-            
-            if borough_code and block is not None and lot is not None:
-                bbl = f"{borough_code}{int(block):05d}{int(lot):04d}"
-            else:
-                return None
+    def cluster(self) -> None:
+        """
+        Physically reorder the properties table along its GiST index.
         
-        return bbl.zfill(10)  # Ensure 10 digits
+        Spatially close parcels end up in neighbouring pages, which keeps the
+        BRIN index ranges tight. Takes an exclusive lock on the table; run it
+        after a bulk load, not while the API is serving traffic.
+        """
+        logger.info("Clustering properties on idx_properties_geometry")
+        self.db.execute(text(f"CLUSTER {Property.__tablename__} USING idx_properties_geometry"))
+        self.db.execute(text(f"ANALYZE {Property.__tablename__}"))
+        self.db.commit()
     
-    def _get_borough_code(self, row) -> Optional[str]:
-        """Get borough code (1=Manhattan, 2=Bronx, 3=Brooklyn, 4=Queens, 5=Staten Island)."""
-        borough = row.get("Borough", row.get("borough", row.get("BOROCODE")))
-        
-        if borough is None:
-            return None
-        
-        borough_str = str(borough).upper()
-        borough_map = {
-            "1": "1", "MANHATTAN": "1", "MN": "1",
-            "2": "2", "BRONX": "2", "BX": "2",
-            "3": "3", "BROOKLYN": "3", "BK": "3", "KINGS": "3",
-            "4": "4", "QUEENS": "4", "QN": "4",
-            "5": "5", "STATEN ISLAND": "5", "SI": "5", "RICHMOND": "5"
-        }
+    def _extract_property_frame(self, gdf: gpd.GeoDataFrame) -> pd.DataFrame:
+        """
+        Extract property data from the whole GeoDataFrame using column operations.
         
-        return borough_map.get(borough_str)
-    
-    def _extract_property_data(self, row) -> dict:
-        """Extract property data from GeoDataFrame row."""
-        bbl = self._extract_bbl(row)
-        borough_code = self._get_borough_code(row)
-        
-        # Map borough code to enum
-        borough_map = {
-            "1": Borough.MANHATTAN,
-            "2": Borough.BRONX,
-            "3": Borough.BROOKLYN,
-            "4": Borough.QUEENS,
-            "5": Borough.STATEN_ISLAND
-        }
+        Returns a DataFrame with one column per entry in COPY_COLUMNS, plus an
+        `_invalid` flag for rows whose block or lot cannot be parsed.
+        """
+        def column(*names) -> pd.Series:
+            # First matching source column, or an all-missing column
+            for name in names:
+                if name in gdf.columns:
+                    return gdf[name]
+            return pd.Series(None, index=gdf.index, dtype=object)
         
-        borough = borough_map.get(borough_code, Borough.MANHATTAN)
-        
-        # Extract address
-        address = row.get("Address", row.get("address"))
-        if not address:
-            # Try to construct from components
-            house_num = row.get("HouseNum", row.get("house_num", ""))
-            street = row.get("Street", row.get("street", ""))
-            if house_num and street:
-                address = f"{house_num} {street}"
-        
-        # Extract numeric fields
-        block = int(row.get("Block", row.get("block", 0)))
-        lot = int(row.get("Lot", row.get("lot", 0)))
-        land_area = self._safe_float(row.get("LotArea", row.get("lot_area")))
-        year_built = self._safe_int(row.get("YearBuilt", row.get("year_built")))
-        num_floors = self._safe_int(row.get("NumFloors", row.get("num_floors")))
-        units_res = self._safe_int(row.get("UnitsRes", row.get("units_res")))
-        units_total = self._safe_int(row.get("UnitsTotal", row.get("units_total")))
-        assessed_value = self._safe_float(row.get("AssessTot", row.get("assess_tot")))
-        
-        # Extract zoning codes
-        zoning_districts = []
-        if "ZoneDist1" in row and row["ZoneDist1"]:
-            zoning_districts.append(str(row["ZoneDist1"]))
-        if "ZoneDist2" in row and row["ZoneDist2"]:
-            zoning_districts.append(str(row["ZoneDist2"]))
-        if "ZoneDist3" in row and row["ZoneDist3"]:
-            zoning_districts.append(str(row["ZoneDist3"]))
-        if "ZoneDist4" in row and row["ZoneDist4"]:
-            zoning_districts.append(str(row["ZoneDist4"]))
-        
-        # Get geometry (should be a Shapely geometry)
-        geometry = row.geometry
-        
-        return {
-            "bbl": bbl,
-            "address": address,
-            "borough": borough,
-            "block": block,
-            "lot": lot,
-            "geometry": WKTElement(geometry.wkt, srid=4326),  # Convert to WKT for PostGIS
-            "land_area": land_area,
-            "year_built": year_built,
-            "num_floors": num_floors,
-            "units_res": units_res,
-            "units_total": units_total,
-            "assessed_value": assessed_value,
-            "zoning_districts": zoning_districts if zoning_districts else None
-        }
-    
-    def _safe_int(self, value) -> Optional[int]:
-        """Safely convert value to int."""
-        if value is None or value == "":
-            return None
-        try:
-            return int(float(value))
-        except (ValueError, TypeError):
-            return None
-    
-    def _safe_float(self, value) -> Optional[float]:
-        """Safely convert value to float."""
-        if value is None or value == "":
-            return None
-        try:
-            return float(value)
-        except (ValueError, TypeError):
-            return None
+        def text_column(*names) -> pd.Series:
+            values = column(*names).astype("string").str.strip()
+            return values.mask(values == "")
+        
+        def int_column(*names) -> pd.Series:
+            return np.trunc(pd.to_numeric(column(*names), errors="coerce")).astype("Int64")
+        
+        def float_column(*names) -> pd.Series:
+            return pd.to_numeric(column(*names), errors="coerce")
+        
+        frame = pd.DataFrame(index=gdf.index)
+        
+        # Borough code and enum
+        borough_code = column("Borough", "borough", "BOROCODE").astype("string").str.upper().map(BOROUGH_CODES)
+        frame["borough"] = borough_code.map(BOROUGH_ENUMS).fillna(Borough.MANHATTAN)
+        
+        # Block and lot default to 0 when the column is absent
+        block = int_column("Block", "block")
+        lot = int_column("Lot", "lot")
+        frame["_invalid"] = False
+        if "Block" in gdf.columns or "block" in gdf.columns:
+            frame["_invalid"] |= block.isna()
+        if "Lot" in gdf.columns or "lot" in gdf.columns:
+            frame["_invalid"] |= lot.isna()
+        
+        # BBL, either from the BBL field or constructed from borough, block, lot
+        if "BBL" in gdf.columns or "bbl" in gdf.columns:
+            raw_bbl = column("BBL", "bbl")
+            if pd.api.types.is_numeric_dtype(raw_bbl):
+                raw_bbl = raw_bbl.astype("Int64")
+            frame["bbl"] = raw_bbl.astype("string").str.zfill(10)  # Ensure 10 digits
+        else:
+            frame["bbl"] = (
+                borough_code
+                + block.astype("string").str.zfill(5)
+                + lot.astype("string").str.zfill(4)
+            )
+        
+        frame["block"] = block.fillna(0)
+        frame["lot"] = lot.fillna(0)
+        
+        # Address, falling back to house number + street
+        house_num = text_column("HouseNum", "house_num")
+        street = text_column("Street", "street")
+        frame["address"] = text_column("Address", "address").fillna(house_num + " " + street)
+        
+        # Numeric fields
+        frame["land_area"] = float_column("LotArea", "lot_area")
+        frame["year_built"] = int_column("YearBuilt", "year_built")
+        frame["num_floors"] = int_column("NumFloors", "num_floors")
+        frame["units_res"] = int_column("UnitsRes", "units_res")
+        frame["units_total"] = int_column("UnitsTotal", "units_total")
+        frame["assessed_value"] = float_column("AssessTot", "assess_tot")
+        
+        # Zoning codes
+        zone_columns = [c for c in ["ZoneDist1", "ZoneDist2", "ZoneDist3", "ZoneDist4"] if c in gdf.columns]
+        if zone_columns:
+            zones = pd.concat([text_column(c) for c in zone_columns], axis=1)
+            frame["zoning_districts"] = [
+                [code for code in codes if code is not pd.NA] or None
+                for codes in zones.itertuples(index=False, name=None)
+            ]
+        else:
+            frame["zoning_districts"] = None
+        
+        # Geometry (Shapely geometries) converted to hex EWKB for PostGIS in one vectorized call
+        frame["geometry"] = shapely.to_wkb(
+            shapely.set_srid(gdf.geometry.to_numpy(), 4326),
+            hex=True,
+            include_srid=True
+        )
+        
+        return frame[COPY_COLUMNS + ["_invalid"]]
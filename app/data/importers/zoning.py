@@ -2,17 +2,43 @@
 Zoning district data importer.
 Imports NYC zoning district data from Shapefile format.
 """
+import math
+
 import geopandas as gpd
+import pandas as pd
+import pyarrow as pa
+import pyogrio
+import shapely
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import Optional, Dict
+from typing import Dict
 from tqdm import tqdm
 import logging
+import uuid
 
 from app.models.zoning import ZoningDistrict, ZoningType
-from geoalchemy2 import WKTElement
+from app.data.importers.bulk import load_records, staged_update
+from app.services.spatial import SpatialService
+from app.services.cache import response_cache, NEARBY_GEOMETRY_PREFIX
 
 logger = logging.getLogger(__name__)
 
+# Zoning code fields, tried in order
+ZONING_CODE_FIELDS = ["ZONEDIST", "ZONEDIST1", "ZONE", "ZONING", "ZONING_CODE"]
+
+# Zoning type by the first letter of the zoning code (anything else is Mixed)
+ZONING_TYPE_PREFIXES = {
+    "R": ZoningType.RESIDENTIAL,
+    "C": ZoningType.COMMERCIAL,
+    "M": ZoningType.MANUFACTURING,
+}
+
+# Columns written by COPY, in the order produced by _extract_zoning_data
+COPY_COLUMNS = [
+    "zoning_code", "zoning_type", "geometry",
+    "far_residential", "far_commercial", "max_height", "setback_requirements",
+]
+
 
 class ZoningImporter:
     """Importer for zoning district data."""
@@ -27,7 +53,8 @@ class ZoningImporter:
         file_path: str,
         batch_size: int = 500,
         update_existing: bool = False,
-        dry_run: bool = False
+        dry_run: bool = False,
+        use_copy: bool = True
     ) -> dict:
         """
         Import zoning district data from a file.
@@ -37,27 +64,26 @@ class ZoningImporter:
             batch_size: Number of records to process before committing
             update_existing: If True, update existing records; if False, skip duplicates
             dry_run: If True, don't actually insert data
+            use_copy: If True, load with COPY; if False, use batched INSERTs
         
         Returns:
             Dictionary with import statistics
         """
         logger.info(f"Loading zoning data from {file_path}")
         
-        # Read GeoDataFrame
-        gdf = gpd.read_file(file_path)
+        # Read layer metadata only; features are streamed one batch at a time
+        info = pyogrio.read_info(file_path)
         
         # Ensure CRS is WGS84 (EPSG:4326)
-        if gdf.crs is None:
+        if info["crs"] is None:
             logger.warning("No CRS found, assuming WGS84")
-            gdf.set_crs("EPSG:4326", inplace=True)
-        elif gdf.crs.to_string() != "EPSG:4326":
-            logger.info(f"Reprojecting from {gdf.crs} to EPSG:4326")
-            gdf = gdf.to_crs("EPSG:4326")
+        elif info["crs"] != "EPSG:4326":
+            logger.info(f"Reprojecting from {info['crs']} to EPSG:4326")
         
-        logger.info(f"Loaded {len(gdf)} zoning districts")
+        logger.info(f"Found {info['features']} zoning districts")
         
         stats = {
-            "total": len(gdf),
+            "total": info["features"],
             "inserted": 0,
             "updated": 0,
             "skipped": 0,
@@ -68,93 +94,163 @@ class ZoningImporter:
             logger.info("DRY RUN - No data will be inserted")
             return stats
         
-        # Process in batches
-        for idx in tqdm(range(0, len(gdf), batch_size), desc="Importing zoning districts"):
-            batch = gdf.iloc[idx:idx + batch_size]
+        # Load existing zoning codes once; the zoning table is small
+        existing_codes = set(self.db.execute(select(ZoningDistrict.zoning_code)).scalars())
+        
+        # Open the layer once and process its features one Arrow record batch at a time
+        with pyogrio.open_arrow(
+            file_path, columns=ZONING_CODE_FIELDS, batch_size=batch_size, use_pyarrow=True
+        ) as (meta, reader):
+            for record_batch in tqdm(
+                reader,
+                total=math.ceil(info["features"] / batch_size),
+                desc="Importing zoning districts"
+            ):
+                batch = self._prepare_batch(record_batch, meta)
+                self._import_batch(batch, existing_codes, stats, update_existing, use_copy)
+        
+        # Rebuild subdivided geometries used by intersection queries
+        logger.info("Refreshing zoning district subdivisions")
+        SpatialService(self.db).refresh_zoning_district_subdivisions()
+        
+        # Cached nearby-geometry payloads include zoning districts
+        response_cache.delete_prefix(NEARBY_GEOMETRY_PREFIX)
+        
+        logger.info(f"Import complete: {stats}")
+        return stats
+    
+    def _import_batch(
+        self,
+        batch: gpd.GeoDataFrame,
+        existing_codes: set,
+        stats: dict,
+        update_existing: bool,
+        use_copy: bool
+    ) -> None:
+        """
+        Insert or update one prepared batch of zoning districts and commit it.
+        
+        Updates `stats` in place, and adds the codes it inserts to `existing_codes`.
+        """
+        # Extract all records for the batch, keeping the first row per zoning code
+        records = {}
+        for zoning_code, zoning_type, wkb_hex in zip(
+            batch["_zoning_code"].to_numpy(),
+            batch["_zoning_type"].to_numpy(),
+            batch["_wkb_hex"].to_numpy()
+        ):
+            if zoning_code is None or zoning_code in records:
+                stats["skipped"] += 1
+                continue
+            
+            records[zoning_code] = self._extract_zoning_data(zoning_code, zoning_type, wkb_hex)
+        
+        if not records:
+            return
+        
+        new_records = [data for code, data in records.items() if code not in existing_codes]
+        updated_records = [data for code, data in records.items() if code in existing_codes]
+        
+        try:
+            if new_records:
+                load_records(
+                    self.db,
+                    ZoningDistrict.__tablename__,
+                    ["id"] + COPY_COLUMNS,
+                    ([uuid.uuid4()] + [data[c] for c in COPY_COLUMNS] for data in new_records),
+                    use_copy=use_copy
+                )
             
-            for _, row in batch.iterrows():
-                try:
-                    # Extract zoning code
-                    zoning_code = self._extract_zoning_code(row)
-                    if not zoning_code:
-                        stats["skipped"] += 1
-                        continue
-                    
-                    # Check if zoning district exists
-                    existing = self.db.query(ZoningDistrict).filter(
-                        ZoningDistrict.zoning_code == zoning_code
-                    ).first()
-                    
-                    if existing and not update_existing:
-                        stats["skipped"] += 1
-                        continue
-                    
-                    # Extract zoning data
-                    zoning_data = self._extract_zoning_data(row, zoning_code)
-                    
-                    if existing and update_existing:
-                        # Update existing district
-                        for key, value in zoning_data.items():
-                            setattr(existing, key, value)
-                        stats["updated"] += 1
-                    else:
-                        # Create new district
-                        zoning_district = ZoningDistrict(**zoning_data)
-                        self.db.add(zoning_district)
-                        stats["inserted"] += 1
-                
-                except Exception as e:
-                    logger.error(f"Error processing zoning district: {e}")
-                    stats["errors"] += 1
-                    continue
+            if updated_records and update_existing:
+                staged_update(
+                    self.db,
+                    ZoningDistrict.__tablename__,
+                    "zoning_code",
+                    COPY_COLUMNS,
+                    ([data[c] for c in COPY_COLUMNS] for data in updated_records),
+                    use_copy=use_copy
+                )
             
             # Commit batch
             self.db.commit()
+        except Exception as e:
+            logger.error(f"Error importing zoning district batch: {e}")
+            self.db.rollback()
+            stats["errors"] += len(records)
+            return
         
-        logger.info(f"Import complete: {stats}")
-        return stats
+        # Codes inserted by this batch exist for the later ones
+        existing_codes.update(data["zoning_code"] for data in new_records)
+        
+        stats["inserted"] += len(new_records)
+        if update_existing:
+            stats["updated"] += len(updated_records)
+        else:
+            stats["skipped"] += len(updated_records)
     
-    def _extract_zoning_code(self, row) -> Optional[str]:
-        """Extract zoning code from row data."""
-        # Common field names for zoning code
-        for field in ["ZONEDIST", "ZONEDIST1", "ZONE", "ZONING", "ZONING_CODE"]:
-            if field in row and row[field]:
-                return str(row[field]).strip()
-        return None
+    def _prepare_batch(self, record_batch: pa.RecordBatch, meta: dict) -> gpd.GeoDataFrame:
+        """
+        Convert one Arrow record batch from the layer into a batch ready for import.
+        
+        Adds hex EWKB geometry (_wkb_hex), zoning code (_zoning_code) and
+        zoning type (_zoning_type) columns, computed for the whole batch at once.
+        """
+        # GeoDataFrame from the batch's fields and WKB geometry column
+        df = record_batch.to_pandas()
+        geometry = shapely.from_wkb(df.pop(meta["geometry_name"] or "wkb_geometry").to_numpy())
+        gdf = gpd.GeoDataFrame(df, geometry=geometry, crs=meta["crs"])
+        
+        if gdf.crs is None:
+            gdf.set_crs("EPSG:4326", inplace=True)
+        elif gdf.crs.to_string() != "EPSG:4326":
+            gdf = gdf.to_crs("EPSG:4326")
+        
+        # Geometry (Shapely geometries) converted to hex EWKB for PostGIS in one vectorized call
+        gdf["_wkb_hex"] = shapely.to_wkb(
+            shapely.set_srid(gdf.geometry.to_numpy(), 4326),
+            hex=True,
+            include_srid=True
+        )
+        
+        gdf["_zoning_code"] = self._extract_zoning_codes(gdf)
+        gdf["_zoning_type"] = self._determine_zoning_types(gdf["_zoning_code"])
+        
+        return gdf
     
-    def _extract_zoning_data(self, row, zoning_code: str) -> dict:
-        """Extract zoning district data from GeoDataFrame row."""
-        # Determine zoning type from code
-        zoning_type = self._determine_zoning_type(zoning_code)
+    def _extract_zoning_codes(self, gdf: gpd.GeoDataFrame) -> pd.Series:
+        """
+        Extract zoning codes for the whole GeoDataFrame.
         
+        A row takes the first non-empty field in ZONING_CODE_FIELDS. Rows
+        without a zoning code get None.
+        """
+        codes = pd.Series(pd.NA, index=gdf.index, dtype="string")
+        for field in ZONING_CODE_FIELDS:
+            if field in gdf.columns:
+                values = gdf[field].astype("string").str.strip()
+                codes = codes.fillna(values.mask(values == ""))
+        
+        return codes.astype(object).where(codes.notna(), None)
+    
+    def _extract_zoning_data(self, zoning_code: str, zoning_type: ZoningType, wkb_hex: str) -> dict:
+        """Build the zoning district record for a zoning code and its geometry."""
         # Get FAR and height from lookup table
         lookup_data = self.zoning_lookup.get(zoning_code, {})
         
-        # Get geometry
-        geometry = row.geometry
-        
         return {
             "zoning_code": zoning_code,
             "zoning_type": zoning_type,
-            "geometry": WKTElement(geometry.wkt, srid=4326),  # Convert to WKT for PostGIS
+            "geometry": wkb_hex,  # Precomputed hex EWKB
             "far_residential": lookup_data.get("far_residential"),
             "far_commercial": lookup_data.get("far_commercial"),
             "max_height": lookup_data.get("max_height"),
             "setback_requirements": lookup_data.get("setback_requirements")
         }
     
-    def _determine_zoning_type(self, zoning_code: str) -> ZoningType:
-        """Determine zoning type from zoning code."""
-        code_upper = zoning_code.upper()
-        
-        if code_upper.startswith("R"):
-            return ZoningType.RESIDENTIAL
-        elif code_upper.startswith("C"):
-            return ZoningType.COMMERCIAL
-        elif code_upper.startswith("M"):
-            return ZoningType.MANUFACTURING
-        else:
-            return ZoningType.MIXED
+    def _determine_zoning_types(self, zoning_codes: pd.Series) -> pd.Series:
+        """Determine zoning types for a column of zoning codes."""
+        prefixes = zoning_codes.astype("string").str[:1].str.upper()
+        return prefixes.map(ZONING_TYPE_PREFIXES).fillna(ZoningType.MIXED).astype(object)
     
     def _load_zoning_lookup(self) -> Dict[str, dict]:
         """
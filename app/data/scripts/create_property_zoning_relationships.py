@@ -4,13 +4,17 @@ This should be run after importing both properties and zoning districts.
 """
 import click
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
 from tqdm import tqdm
 
-from app.database import SessionLocal
+from app.database import make_bulk_engine
 from app.models.property import Property
 from app.services.spatial import SpatialService
 
+# Sessions for scripts use an engine with SQL echo disabled
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=make_bulk_engine())
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -25,48 +29,51 @@ def create_relationships(batch_size: int, limit: int):
     db = SessionLocal()
     
     try:
-        # Get all properties
-        query = db.query(Property)
+        # Count properties; IDs are read one batch at a time below
+        total = db.execute(select(func.count()).select_from(Property)).scalar()
         if limit:
-            query = query.limit(limit)
-        properties = query.all()
+            total = min(total, limit)
         
-        click.echo(f"Processing {len(properties)} properties...")
+        click.echo(f"Processing {total} properties...")
         
         spatial_service = SpatialService(db)
         created = 0
-        skipped = 0
+        errors = 0
+        processed = 0
+        last_id = None
         
-        for property_obj in tqdm(properties, desc="Creating relationships"):
-            try:
-                # Check if relationships already exist
-                existing_count = len(spatial_service.get_property_zoning_districts(property_obj))
+        with tqdm(total=total, desc="Creating relationships") as progress:
+            while processed < total:
+                # Keyset pagination on the primary key keeps memory bounded to
+                # one batch and, unlike a server-side cursor, survives commits
+                query = select(Property.id).order_by(Property.id).limit(
+                    min(batch_size, total - processed)
+                )
+                if last_id is not None:
+                    query = query.where(Property.id > last_id)
+                batch = db.execute(query).scalars().all()
+                if not batch:
+                    break
                 
-                if existing_count > 0:
-                    skipped += 1
-                    continue
+                last_id = batch[-1]
+                processed += len(batch)
+                progress.update(len(batch))
                 
-                # Create relationships
-                spatial_service.create_property_zoning_relationships(property_obj)
-                created += 1
+                try:
+                    # One INSERT ... SELECT per batch; properties with relationships are skipped
+                    created += spatial_service.bulk_create_property_zoning_relationships(batch)
                 
-                # Commit periodically
-                if created % batch_size == 0:
-                    db.commit()
-            
-            except Exception as e:
-                logger.error(f"Error processing property {property_obj.bbl}: {e}")
-                db.rollback()
-                continue
-        
-        # Final commit
-        db.commit()
+                except Exception as e:
+                    logger.error(f"Error processing property batch ending at {last_id}: {e}")
+                    db.rollback()
+                    errors += len(batch)
+                    continue
         
         click.echo("")
         click.echo(f"Relationships created: {created}")
-        click.echo(f"Properties skipped (already have relationships): {skipped}")
+        click.echo(f"Properties with errors: {errors}")
         click.echo("Done!")
-        
+    
     except Exception as e:
         db.rollback()
         click.echo(f"Error: {e}", err=True)
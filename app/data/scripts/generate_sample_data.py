@@ -3,101 +3,110 @@ Generate sample test data for development and testing.
 This creates minimal sample data so the system can be tested without downloading large NYC files.
 """
 import click
-from sqlalchemy.orm import Session
-from geoalchemy2 import WKTElement
-from shapely.geometry import Point, Polygon
-import random
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point, box
+import numpy as np
 from datetime import date
+from typing import List
+from sqlalchemy.orm import sessionmaker
 
-from app.database import SessionLocal
+from app.database import make_bulk_engine
 from app.models.property import Property, Borough
 from app.models.zoning import ZoningDistrict, ZoningType
 from app.models.landmark import Landmark, LandmarkType
 from app.models.zoning import PropertyZoning
+from app.services.spatial import SpatialService
 
+# Sessions for scripts use an engine with SQL echo disabled
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=make_bulk_engine())
 
-def create_sample_property(db: Session, bbl: str, borough: Borough, 
-                          address: str, center_lon: float, center_lat: float) -> Property:
-    """Create a sample property with a small polygon around given coordinates."""
-    # Create a small square polygon (approximately 100x100 feet)
+
+def create_sample_properties(count: int, center_lon: float, center_lat: float,
+                            rng: np.random.Generator) -> List[Property]:
+    """
+    Create sample properties on a grid starting at the given coordinates.
+    
+    Properties are laid out 10 per row, about 100 feet apart, with BBLs
+    1000120001, 1000120002, ... Attribute values are drawn for all properties
+    at once, one NumPy call per column.
+    """
+    # Create small square polygons (approximately 100x100 feet)
     # Roughly 0.0003 degrees ≈ 100 feet in NYC area
     offset = 0.0003
     
-    polygon = Polygon([
-        (center_lon - offset, center_lat - offset),
-        (center_lon + offset, center_lat - offset),
-        (center_lon + offset, center_lat + offset),
-        (center_lon - offset, center_lat + offset),
-        (center_lon - offset, center_lat - offset)
-    ])
+    # One draw per column for all properties (tolist() gives Python scalars for the driver)
+    land_areas = rng.uniform(2000, 10000, count).tolist()
+    years_built = rng.integers(1900, 2021, count).tolist()
+    num_floors = rng.integers(1, 11, count).tolist()
+    units_res = rng.integers(0, 51, count).tolist()
+    units_total = rng.integers(1, 101, count).tolist()
+    assessed_values = rng.uniform(500000, 5000000, count).tolist()
     
-    property_obj = Property(
-        bbl=bbl,
-        address=address,
-        borough=borough,
-        block=int(bbl[1:6]),
-        lot=int(bbl[6:10]),
-        geometry=WKTElement(polygon.wkt, srid=4326),
-        land_area=random.uniform(2000, 10000),
-        year_built=random.randint(1900, 2020),
-        num_floors=random.randint(1, 10),
-        units_res=random.randint(0, 50),
-        units_total=random.randint(1, 100),
-        assessed_value=random.uniform(500000, 5000000),
-        zoning_districts=["R7-2"]
-    )
+    properties = []
+    for i in range(count):
+        lon = center_lon + (i % 10) * offset
+        lat = center_lat + (i // 10) * offset
+        bbl = f"100012{i + 1:04d}"
+        
+        properties.append(Property(
+            bbl=bbl,
+            address=f"{123 + 2 * i} Central Park West, Manhattan",
+            borough=Borough.MANHATTAN,
+            block=int(bbl[1:6]),
+            lot=int(bbl[6:10]),
+            geometry=from_shape(box(lon - offset, lat - offset, lon + offset, lat + offset), srid=4326, extended=True),
+            land_area=land_areas[i],
+            year_built=years_built[i],
+            num_floors=num_floors[i],
+            units_res=units_res[i],
+            units_total=units_total[i],
+            assessed_value=assessed_values[i],
+            zoning_districts=None
+        ))
     
-    db.add(property_obj)
-    return property_obj
+    return properties
 
 
-def create_sample_zoning_district(db: Session, code: str, center_lon: float, 
-                                 center_lat: float) -> ZoningDistrict:
+def create_sample_zoning_district(code: str, center_lon: float, center_lat: float,
+                                 rng: np.random.Generator) -> ZoningDistrict:
     """Create a sample zoning district."""
     # Create a larger polygon covering the area
     offset = 0.001
     
-    polygon = Polygon([
-        (center_lon - offset, center_lat - offset),
-        (center_lon + offset, center_lat - offset),
-        (center_lon + offset, center_lat + offset),
-        (center_lon - offset, center_lat + offset),
-        (center_lon - offset, center_lat - offset)
-    ])
+    polygon = box(center_lon - offset, center_lat - offset, center_lon + offset, center_lat + offset)
     
     # Determine zoning type from code
     if code.startswith("R"):
         zoning_type = ZoningType.RESIDENTIAL
-        far_residential = random.uniform(2.0, 6.0)
+        far_residential = rng.uniform(2.0, 6.0)
         far_commercial = None
     elif code.startswith("C"):
         zoning_type = ZoningType.COMMERCIAL
         far_residential = None
-        far_commercial = random.uniform(6.0, 15.0)
+        far_commercial = rng.uniform(6.0, 15.0)
     elif code.startswith("M"):
         zoning_type = ZoningType.MANUFACTURING
         far_residential = None
         far_commercial = None
     else:
         zoning_type = ZoningType.MIXED
-        far_residential = random.uniform(2.0, 6.0)
-        far_commercial = random.uniform(6.0, 12.0)
+        far_residential = rng.uniform(2.0, 6.0)
+        far_commercial = rng.uniform(6.0, 12.0)
     
     zoning = ZoningDistrict(
         zoning_code=code,
         zoning_type=zoning_type,
-        geometry=WKTElement(polygon.wkt, srid=4326),
+        geometry=from_shape(polygon, srid=4326, extended=True),
         far_residential=far_residential,
         far_commercial=far_commercial,
-        max_height=random.uniform(50, 200),
+        max_height=rng.uniform(50, 200),
         setback_requirements={"front": 10, "rear": 20}
     )
     
-    db.add(zoning)
     return zoning
 
 
-def create_sample_landmark(db: Session, name: str, landmark_type: LandmarkType,
+def create_sample_landmark(name: str, landmark_type: LandmarkType,
                           center_lon: float, center_lat: float) -> Landmark:
     """Create a sample landmark."""
     # Create a point or small polygon
@@ -106,29 +115,22 @@ def create_sample_landmark(db: Session, name: str, landmark_type: LandmarkType,
     else:
         # For districts, create a small polygon
         offset = 0.0005
-        polygon = Polygon([
-            (center_lon - offset, center_lat - offset),
-            (center_lon + offset, center_lat - offset),
-            (center_lon + offset, center_lat + offset),
-            (center_lon - offset, center_lat + offset),
-            (center_lon - offset, center_lat - offset)
-        ])
-        geometry = polygon
+        geometry = box(center_lon - offset, center_lat - offset, center_lon + offset, center_lat + offset)
     
     landmark = Landmark(
         name=name,
         landmark_type=landmark_type,
-        geometry=WKTElement(geometry.wkt, srid=4326),
+        geometry=from_shape(geometry, srid=4326, extended=True),
         designation_date=date(1970, 1, 1)
     )
     
-    db.add(landmark)
     return landmark
 
 
 @click.command()
 @click.option("--clear-existing", is_flag=True, help="Clear existing data before generating")
-def generate_sample_data(clear_existing: bool):
+@click.option("--num-properties", default=3, type=click.IntRange(1, 9999), help="Number of sample properties to generate")
+def generate_sample_data(clear_existing: bool, num_properties: int):
     """Generate sample test data for development and testing."""
     db = SessionLocal()
     
@@ -147,75 +149,66 @@ def generate_sample_data(clear_existing: bool):
         manhattan_lon = -73.9654
         manhattan_lat = 40.7829
         
+        rng = np.random.default_rng()
+        
         # Create sample zoning districts
         click.echo("Creating zoning districts...")
-        zoning_r7 = create_sample_zoning_district(db, "R7-2", manhattan_lon, manhattan_lat)
-        zoning_c6 = create_sample_zoning_district(db, "C6-2", manhattan_lon + 0.002, manhattan_lat)
-        db.commit()
+        zoning_r7 = create_sample_zoning_district("R7-2", manhattan_lon, manhattan_lat, rng)
+        zoning_c6 = create_sample_zoning_district("C6-2", manhattan_lon + 0.002, manhattan_lat, rng)
         
         # Create sample properties
         click.echo("Creating properties...")
-        prop1 = create_sample_property(
-            db, "1000120001", Borough.MANHATTAN,
-            "123 Central Park West, Manhattan", manhattan_lon, manhattan_lat
-        )
-        prop2 = create_sample_property(
-            db, "1000120002", Borough.MANHATTAN,
-            "125 Central Park West, Manhattan", manhattan_lon + 0.0003, manhattan_lat
-        )
-        prop3 = create_sample_property(
-            db, "1000120003", Borough.MANHATTAN,
-            "127 Central Park West, Manhattan", manhattan_lon + 0.0006, manhattan_lat
-        )
-        db.commit()
+        properties = create_sample_properties(num_properties, manhattan_lon, manhattan_lat, rng)
         
-        # Create property-zoning relationships
+        # Create property-zoning relationships (linked by object, so no flush is needed for IDs)
+        # Each property is assigned the district containing its center
         click.echo("Creating property-zoning relationships...")
-        pz1 = PropertyZoning(
-            property_id=prop1.id,
-            zoning_district_id=zoning_r7.id,
-            is_primary=True
-        )
-        pz2 = PropertyZoning(
-            property_id=prop2.id,
-            zoning_district_id=zoning_r7.id,
-            is_primary=True
-        )
-        pz3 = PropertyZoning(
-            property_id=prop3.id,
-            zoning_district_id=zoning_c6.id,
-            is_primary=True
-        )
-        db.add_all([pz1, pz2, pz3])
-        db.commit()
+        relationships = []
+        for i, property_obj in enumerate(properties):
+            lon_offset = (i % 10) * 0.0003
+            lat_offset = (i // 10) * 0.0003
+            if lat_offset > 0.001:
+                continue
+            zoning = zoning_r7 if lon_offset <= 0.001 else zoning_c6
+            property_obj.zoning_districts = [zoning.zoning_code]
+            relationships.append(
+                PropertyZoning(property=property_obj, zoning_district=zoning, is_primary=True)
+            )
         
         # Create sample landmarks
         click.echo("Creating landmarks...")
-        # Landmark close to properties (within 150 feet)
-        landmark1 = create_sample_landmark(
-            db, "Central Park Historic District", LandmarkType.HISTORIC_DISTRICT,
-            manhattan_lon + 0.0002, manhattan_lat + 0.0002
-        )
-        # Individual landmark
-        landmark2 = create_sample_landmark(
-            db, "Sample Individual Landmark", LandmarkType.INDIVIDUAL,
-            manhattan_lon + 0.0001, manhattan_lat
-        )
-        db.commit()
+        landmarks = [
+            # Landmark close to properties (within 150 feet)
+            create_sample_landmark(
+                "Central Park Historic District", LandmarkType.HISTORIC_DISTRICT,
+                manhattan_lon + 0.0002, manhattan_lat + 0.0002
+            ),
+            # Individual landmark
+            create_sample_landmark(
+                "Sample Individual Landmark", LandmarkType.INDIVIDUAL,
+                manhattan_lon + 0.0001, manhattan_lat
+            ),
+        ]
+        
+        # Save everything in one transaction
+        db.add_all([zoning_r7, zoning_c6] + properties + relationships + landmarks)
+        db.flush()
+        
+        # Subdivisions are rebuilt from the flushed districts and committed with the rest
+        SpatialService(db).refresh_zoning_district_subdivisions()
         
         click.echo("")
         click.echo("Sample data generated successfully!")
         click.echo("")
-        click.echo("Sample properties:")
-        click.echo(f"  - BBL: 1000120001 (123 Central Park West)")
-        click.echo(f"  - BBL: 1000120002 (125 Central Park West)")
-        click.echo(f"  - BBL: 1000120003 (127 Central Park West)")
+        click.echo(f"Sample properties ({len(properties)}):")
+        for property_obj in properties[:3]:
+            click.echo(f"  - BBL: {property_obj.bbl} ({property_obj.address.split(',')[0]})")
         click.echo("")
         click.echo("You can now test the API:")
         click.echo("  curl http://localhost:8000/health")
         click.echo("  curl 'http://localhost:8000/api/v1/properties/lookup?bbl=1000120001'")
         click.echo("  curl 'http://localhost:8000/api/v1/properties/1000120001'")
-        
+    
     except Exception as e:
         db.rollback()
         click.echo(f"Error generating sample data: {e}", err=True)
@@ -4,13 +4,16 @@ CLI script for importing NYC data (MapPLUTO, zoning districts, landmarks).
 import click
 import logging
 from pathlib import Path
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 
-from app.database import SessionLocal
+from app.database import make_bulk_engine
 from app.data.importers.mappluto import MapPLUTOImporter
 from app.data.importers.zoning import ZoningImporter
 from app.data.importers.landmarks import LandmarkImporter
 
+# Sessions for scripts use an engine with SQL echo disabled
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=make_bulk_engine())
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -26,7 +29,9 @@ def cli():
 @click.option("--batch-size", default=1000, help="Batch size for processing")
 @click.option("--update-existing", is_flag=True, help="Update existing records instead of skipping")
 @click.option("--dry-run", is_flag=True, help="Dry run - don't actually insert data")
-def mappluto(file: str, batch_size: int, update_existing: bool, dry_run: bool):
+@click.option("--no-copy", is_flag=True, help="Use batched INSERTs instead of COPY (for connections that don't allow COPY)")
+@click.option("--cluster", is_flag=True, help="CLUSTER the properties table on its spatial index after loading")
+def mappluto(file: str, batch_size: int, update_existing: bool, dry_run: bool, no_copy: bool, cluster: bool):
     """Import MapPLUTO property data."""
     db = SessionLocal()
     try:
@@ -35,9 +40,13 @@ def mappluto(file: str, batch_size: int, update_existing: bool, dry_run: bool):
             file_path=file,
             batch_size=batch_size,
             update_existing=update_existing,
-            dry_run=dry_run
+            dry_run=dry_run,
+            use_copy=not no_copy
         )
         click.echo(f"Import complete: {stats}")
+        
+        if cluster and not dry_run:
+            importer.cluster()
     finally:
         db.close()
 
@@ -47,7 +56,8 @@ def mappluto(file: str, batch_size: int, update_existing: bool, dry_run: bool):
 @click.option("--batch-size", default=500, help="Batch size for processing")
 @click.option("--update-existing", is_flag=True, help="Update existing records instead of skipping")
 @click.option("--dry-run", is_flag=True, help="Dry run - don't actually insert data")
-def zoning(file: str, batch_size: int, update_existing: bool, dry_run: bool):
+@click.option("--no-copy", is_flag=True, help="Use batched INSERTs instead of COPY (for connections that don't allow COPY)")
+def zoning(file: str, batch_size: int, update_existing: bool, dry_run: bool, no_copy: bool):
     """Import zoning district data."""
     db = SessionLocal()
     try:
@@ -56,7 +66,8 @@ def zoning(file: str, batch_size: int, update_existing: bool, dry_run: bool):
             file_path=file,
             batch_size=batch_size,
             update_existing=update_existing,
-            dry_run=dry_run
+            dry_run=dry_run,
+            use_copy=not no_copy
         )
         click.echo(f"Import complete: {stats}")
     finally:
@@ -68,7 +79,8 @@ def zoning(file: str, batch_size: int, update_existing: bool, dry_run: bool):
 @click.option("--batch-size", default=500, help="Batch size for processing")
 @click.option("--update-existing", is_flag=True, help="Update existing records instead of skipping")
 @click.option("--dry-run", is_flag=True, help="Dry run - don't actually insert data")
-def landmarks(file: str, batch_size: int, update_existing: bool, dry_run: bool):
+@click.option("--no-copy", is_flag=True, help="Use batched INSERTs instead of COPY (for connections that don't allow COPY)")
+def landmarks(file: str, batch_size: int, update_existing: bool, dry_run: bool, no_copy: bool):
     """Import landmark data."""
     db = SessionLocal()
     try:
@@ -77,7 +89,8 @@ def landmarks(file: str, batch_size: int, update_existing: bool, dry_run: bool):
             file_path=file,
             batch_size=batch_size,
             update_existing=update_existing,
-            dry_run=dry_run
+            dry_run=dry_run,
+            use_copy=not no_copy
         )
         click.echo(f"Import complete: {stats}")
     finally:
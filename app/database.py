@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, event, text
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
@@ -12,11 +13,36 @@ engine = create_engine(
     pool_size=10,
     max_overflow=20,
     echo=settings.DEBUG,
+    # Room for every compiled statement the API and services issue (default 500),
+    # so none are evicted and recompiled under load
+    query_cache_size=1200,
+    # psycopg2 fast-execution helpers: multi-row VALUES for INSERT executemany
+    # and execute_batch for UPDATE/DELETE executemany
+    executemany_mode="values_plus_batch",
+    insertmanyvalues_page_size=10000,
+    executemany_batch_page_size=1000,
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def make_bulk_engine() -> Engine:
+    """
+    Create an engine for the data import scripts.
+    SQL echo is always off, even with DEBUG set, since logging every statement
+    and parameter row dominates bulk-load time.
+    """
+    return create_engine(
+        settings.DATABASE_URL,
+        pool_pre_ping=True,
+        echo=False,
+        echo_pool=False,
+        executemany_mode="values_plus_batch",
+        insertmanyvalues_page_size=10000,
+        executemany_batch_page_size=1000,
+    )
+
 # Base class for models
 Base = declarative_base()
 
@@ -35,18 +61,19 @@ def get_db() -> Generator[Session, None, None]:
 
 def init_db() -> None:
     """
-    Initialize database - create all tables and enable PostGIS extension.
+    Initialize database - create all tables and enable PostGIS and pg_trgm extensions.
     Should be called after Alembic migrations, but useful for testing.
     """
-    # Enable PostGIS extension
+    # Enable PostGIS and pg_trgm extensions
     with engine.connect() as conn:
         conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         conn.commit()
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
 
 
-# Note: PostGIS extension should be enabled manually in the database
-# Run: CREATE EXTENSION IF NOT EXISTS postgis;
+# Note: PostGIS and pg_trgm extensions should be enabled manually in the database
+# Run: CREATE EXTENSION IF NOT EXISTS postgis; CREATE EXTENSION IF NOT EXISTS pg_trgm;
 # The event listener approach doesn't work reliably with connection pooling
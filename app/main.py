@@ -1,4 +1,6 @@
 import logging
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
@@ -7,8 +9,10 @@ from sqlalchemy.orm import Session
 from app.config import settings
 from app.database import engine, get_db
 from app.api.v1.router import api_router
+from app.api.responses import ORJSONResponse
 from app.schemas.response import HealthResponse
 from app.middleware.logging import LoggingMiddleware
+from app.services.geocoding import geocoding_service
 
 # Configure logging
 logging.basicConfig(
@@ -19,10 +23,22 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown."""
+    yield
+    # Close pooled connections to the geocoding provider
+    await geocoding_service.aclose()
+
+
 app = FastAPI(
     title="NYC Real Estate Zoning Platform API",
     description="API for analyzing NYC property zoning and development potential",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # Encode every JSON response with orjson rather than the standard library
+    default_response_class=ORJSONResponse
 )
 
 # Logging middleware (before CORS to log all requests)
@@ -40,6 +56,9 @@ app.add_middleware(
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
+# PostGIS version, fetched by the first successful health check
+_postgis_version: Optional[str] = None
+
 
 @app.get("/health", response_model=HealthResponse)
 def health_check(db: Session = Depends(get_db)):
@@ -47,22 +66,26 @@ def health_check(db: Session = Depends(get_db)):
     Health check endpoint.
     Checks database connectivity and PostGIS availability.
     """
+    global _postgis_version
+    
     try:
-        # Test database connection
-        db.execute(text("SELECT 1"))
+        if _postgis_version is None:
+            # Test database connection and check PostGIS version in one round-trip
+            row = db.execute(text("SELECT 1, PostGIS_Version()")).one()
+            _postgis_version = row[1]
+        else:
+            # PostGIS version doesn't change while the process runs
+            db.execute(text("SELECT 1"))
         db_status = "connected"
-        
-        # Check PostGIS version
-        result = db.execute(text("SELECT PostGIS_Version()"))
-        postgis_version = result.scalar()
     except Exception as e:
         db_status = f"error: {str(e)}"
-        postgis_version = None
+        # Re-check the version once the database is reachable again
+        _postgis_version = None
     
     return HealthResponse(
         status="healthy",
         database=db_status,
-        postgis_version=postgis_version
+        postgis_version=_postgis_version
     )
 
 
@@ -4,60 +4,84 @@ Provides structured logging for requests and responses.
 """
 import time
 import logging
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Iterable
+from starlette.datastructures import MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger(__name__)
 
+# Liveness/landing paths passed straight through without logging or timing
+DEFAULT_SKIP_PATHS = ("/health", "/")
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log HTTP requests and responses."""
+
+class LoggingMiddleware:
+    """
+    Middleware to log HTTP requests and responses.
+    
+    Implemented as plain ASGI middleware rather than BaseHTTPMiddleware to
+    avoid wrapping every request and response in extra tasks and streams.
+    """
+    
+    def __init__(self, app: ASGIApp, skip_paths: Iterable[str] = DEFAULT_SKIP_PATHS):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
         
-        # Log request
-        logger.info(
-            f"Request: {request.method} {request.url.path}",
-            extra={
-                "method": request.method,
-                "path": request.url.path,
-                "query_params": dict(request.query_params),
-                "client_host": request.client.host if request.client else None,
-            }
-        )
+        start = time.perf_counter_ns()
+        method = scope["method"]
+        path = scope["path"]
         
-        # Process request
-        try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-            
-            # Log successful response
+        # Log request (extra fields are only built if INFO is enabled)
+        if logger.isEnabledFor(logging.INFO):
+            client = scope.get("client")
             logger.info(
-                f"Response: {request.method} {request.url.path} - {response.status_code}",
+                f"Request: {method} {path}",
                 extra={
-                    "method": request.method,
-                    "path": request.url.path,
-                    "status_code": response.status_code,
-                    "process_time": round(process_time, 3),
+                    "method": method,
+                    "path": path,
+                    "query_params": dict(QueryParams(scope["query_string"])),
+                    "client_host": client[0] if client else None,
                 }
             )
+        
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                process_time = (time.perf_counter_ns() - start) / 1e9
+                
+                # Log successful response
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        f"Response: {method} {path} - {message['status']}",
+                        extra={
+                            "method": method,
+                            "path": path,
+                            "status_code": message["status"],
+                            "process_time": round(process_time, 3),
+                        }
+                    )
+                
+                # Add process time header
+                MutableHeaders(scope=message).append("X-Process-Time", f"{process_time:.3f}")
             
-            # Add process time header
-            response.headers["X-Process-Time"] = str(round(process_time, 3))
-            
-            return response
+            await send(message)
+        
+        # Process request
+        try:
+            await self.app(scope, receive, send_with_timing)
         
         except Exception as e:
-            process_time = time.time() - start_time
+            process_time = (time.perf_counter_ns() - start) / 1e9
             
             # Log error
             logger.error(
-                f"Error: {request.method} {request.url.path} - {str(e)}",
+                f"Error: {method} {path} - {str(e)}",
                 extra={
-                    "method": request.method,
-                    "path": request.url.path,
+                    "method": method,
+                    "path": path,
                     "error": str(e),
                     "process_time": round(process_time, 3),
                 },
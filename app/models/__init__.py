@@ -1,6 +1,6 @@
 from app.models.base import BaseModel
 from app.models.property import Property, Borough
-from app.models.zoning import ZoningDistrict, ZoningType, PropertyZoning
+from app.models.zoning import ZoningDistrict, ZoningDistrictSubdivision, ZoningType, PropertyZoning
 from app.models.landmark import Landmark, LandmarkType
 
 __all__ = [
@@ -8,6 +8,7 @@ __all__ = [
     "Property",
     "Borough",
     "ZoningDistrict",
+    "ZoningDistrictSubdivision",
     "ZoningType",
     "PropertyZoning",
     "Landmark",
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Date, Index, Enum as SQLEnum
-from geoalchemy2 import Geometry
+from sqlalchemy import Column, String, Date, Index, Computed, Enum as SQLEnum
+from sqlalchemy.orm import deferred
+from geoalchemy2 import Geometry, Geography
 import enum
 
 from app.models.base import BaseModel
@@ -22,13 +23,30 @@ class Landmark(BaseModel):
     landmark_type = Column(SQLEnum(LandmarkType), nullable=False)
     designation_date = Column(Date, nullable=True)
     
-    # PostGIS geometry (polygon for districts, point/polygon for individual landmarks)
+    # PostGIS geometry (polygon for districts, point/polygon for individual landmarks);
+    # indexed explicitly below instead of by GeoAlchemy2's automatic index
     geometry = Column(
-        Geometry(geometry_type='GEOMETRY', srid=4326),
+        Geometry(geometry_type='GEOMETRY', srid=4326, spatial_index=False),
         nullable=False
     )
     
-    # Spatial index on geometry column
+    # Bounding box of the geometry, maintained by PostgreSQL for cheap bbox-only queries
+    # (indexed explicitly below, so GeoAlchemy2's automatic index is turned off)
+    geom_bbox = Column(
+        Geometry(geometry_type='GEOMETRY', srid=4326, spatial_index=False),
+        Computed('ST_Envelope(geometry)', persisted=True)
+    )
+    
+    # Geometry as geography, maintained by PostgreSQL for index-backed distance queries
+    # (deferred: only used inside SQL, never loaded onto the object)
+    geog = deferred(Column(
+        Geography(geometry_type='GEOMETRY', srid=4326, spatial_index=False),
+        Computed('geography(geometry)', persisted=True)
+    ))
+    
+    # Spatial indexes on geometry, bounding box and geography columns
     __table_args__ = (
         Index('idx_landmarks_geometry', geometry, postgresql_using='gist'),
+        Index('idx_landmarks_geom_bbox', geom_bbox, postgresql_using='gist'),
+        Index('idx_landmarks_geog', geog, postgresql_using='gist'),
     )
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Integer, Numeric, ARRAY, Index, Enum as SQLEnum
-from sqlalchemy.orm import relationship
-from geoalchemy2 import Geometry
+from sqlalchemy import Column, String, Integer, Numeric, ARRAY, Index, Computed, Enum as SQLEnum
+from sqlalchemy.orm import relationship, deferred
+from geoalchemy2 import Geometry, Geography
 import enum
 
 from app.models.base import BaseModel
@@ -30,12 +30,20 @@ class Property(BaseModel):
     block = Column(Integer, nullable=False)
     lot = Column(Integer, nullable=False)
     
-    # PostGIS geometry (polygon representing property boundary)
+    # PostGIS geometry (polygon representing property boundary);
+    # indexed explicitly below instead of by GeoAlchemy2's automatic index
     geometry = Column(
-        Geometry(geometry_type='POLYGON', srid=4326),
+        Geometry(geometry_type='POLYGON', srid=4326, spatial_index=False),
         nullable=False
     )
     
+    # Geometry as geography, maintained by PostgreSQL for index-backed distance queries
+    # (deferred: only used inside SQL, never loaded onto the object)
+    geog = deferred(Column(
+        Geography(geometry_type='POLYGON', srid=4326, spatial_index=False),
+        Computed('geography(geometry)', persisted=True)
+    ))
+    
     # Property characteristics
     land_area = Column(Numeric(12, 2), nullable=True)  # square feet
     year_built = Column(Integer, nullable=True)
@@ -54,7 +62,21 @@ class Property(BaseModel):
         cascade="all, delete-orphan"
     )
     
-    # Spatial index on geometry column
+    # Spatial index on geometry column, plus a compact BRIN index for large range
+    # scans over the clustered table; trigram index for substring address search (pg_trgm)
     __table_args__ = (
         Index('idx_properties_geometry', geometry, postgresql_using='gist'),
+        Index('idx_properties_geog', geog, postgresql_using='gist'),
+        Index(
+            'idx_properties_geom_brin',
+            geometry,
+            postgresql_using='brin',
+            postgresql_with={'pages_per_range': 32}
+        ),
+        Index(
+            'idx_properties_address_trgm',
+            address,
+            postgresql_using='gin',
+            postgresql_ops={'address': 'gin_trgm_ops'}
+        ),
     )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, JSON, Index, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Column, String, Numeric, JSON, Boolean, Index, Enum as SQLEnum, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from geoalchemy2 import Geometry
@@ -26,9 +26,10 @@ class ZoningDistrict(BaseModel):
     # Zoning type
     zoning_type = Column(SQLEnum(ZoningType), nullable=False)
     
-    # PostGIS geometry (polygon representing zoning district boundary)
+    # PostGIS geometry (polygon representing zoning district boundary);
+    # indexed with SP-GiST below instead of GeoAlchemy2's default GiST index
     geometry = Column(
-        Geometry(geometry_type='POLYGON', srid=4326),
+        Geometry(geometry_type='POLYGON', srid=4326, spatial_index=False),
         nullable=False
     )
     
@@ -45,9 +46,37 @@ class ZoningDistrict(BaseModel):
         cascade="all, delete-orphan"
     )
     
-    # Spatial index on geometry column
+    # SP-GiST spatial index on geometry column: smaller and faster to probe than
+    # GiST for overlapping district polygons
     __table_args__ = (
-        Index('idx_zoning_districts_geometry', geometry, postgresql_using='gist'),
+        Index('idx_zoning_districts_geometry', geometry, postgresql_using='spgist'),
+    )
+
+
+class ZoningDistrictSubdivision(BaseModel):
+    """
+    Zoning district geometry split into pieces of bounded vertex count (ST_Subdivide).
+    Lets intersection queries test small indexed pieces instead of whole district polygons.
+    """
+    
+    __tablename__ = "zoning_district_subdivisions"
+    
+    zoning_district_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("zoning_districts.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    
+    # PostGIS geometry (one subdivided piece of the district boundary)
+    geometry = Column(
+        Geometry(geometry_type='GEOMETRY', srid=4326, spatial_index=False),
+        nullable=False
+    )
+    
+    # SP-GiST spatial index on geometry column (as for zoning_districts)
+    __table_args__ = (
+        Index('idx_zoning_district_subdivisions_geometry', geometry, postgresql_using='spgist'),
     )
 
 
@@ -69,6 +98,7 @@ class PropertyZoning(BaseModel):
         index=True
     )
     is_primary = Column(
+        Boolean,
         default=False,
         nullable=False
     )  # Is this the primary zoning district?
@@ -77,7 +107,9 @@ class PropertyZoning(BaseModel):
     property = relationship("Property", back_populates="property_zoning")
     zoning_district = relationship("ZoningDistrict", back_populates="property_zoning")
     
-    # Unique constraint to prevent duplicate relationships
+    # Unique constraint to prevent duplicate relationships; partial index for
+    # looking up a property's primary district
     __table_args__ = (
         Index('idx_property_zoning_unique', property_id, zoning_district_id, unique=True),
+        Index('idx_property_zoning_primary', property_id, postgresql_where=is_primary),
     )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from datetime import datetime
 from uuid import UUID
@@ -39,8 +39,7 @@ class PropertyResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PropertyLookupQuery(BaseModel):
@@ -55,3 +54,8 @@ class PropertyLookupQuery(BaseModel):
         if not any([self.address, self.bbl, (self.lat and self.lon)]):
             raise ValueError("At least one of address, bbl, or lat/lon must be provided")
         return self
+
+
+class PropertyBulkLookupRequest(BaseModel):
+    """Request body for bulk property lookup by address."""
+    addresses: List[str] = Field(..., min_length=1, max_length=100, description="Property addresses")
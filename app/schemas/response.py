@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, List
 from app.schemas.property import PropertyResponse
 
 
@@ -9,6 +9,11 @@ class PropertyLookupResponse(BaseModel):
     error: Optional[str] = None
 
 
+class PropertyBulkLookupResponse(BaseModel):
+    """Response schema for bulk property lookup endpoint."""
+    results: List[PropertyLookupResponse] = []
+
+
 class HealthResponse(BaseModel):
     """Health check response schema."""
     status: str
@@ -0,0 +1,226 @@
+"""
+Response cache for expensive, deterministic API payloads.
+Uses Redis when REDIS_URL is configured, otherwise an in-process TTL cache.
+
+Deletes only reach other processes (the API server, other workers) through Redis:
+an importer run without REDIS_URL cannot invalidate the API's in-process entries,
+so in-process TTLs are capped at `local_max_ttl_seconds` to bound staleness.
+
+Two instances: `response_cache` for geometry payloads and `lookup_cache` for
+the small address/geocode/coordinate keys, so in-process lookup traffic
+cannot evict the (much larger, costlier to rebuild) geometry bodies.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import redis
+import redis.asyncio
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Key prefixes for cached geometry payloads
+GEOMETRY_PREFIX = "geom:"
+NEARBY_GEOMETRY_PREFIX = "nearby:"
+ADDRESS_PREFIX = "addr:"
+GEOCODE_PREFIX = "geo:"
+COORDINATE_PREFIX = "coord:"
+
+# Decimal places kept when bucketing coordinates (~11 m at NYC latitudes)
+COORDINATE_PRECISION = 4
+
+
+def geometry_cache_key(bbl: str) -> str:
+    """Cache key for the property geometry payload."""
+    return f"{GEOMETRY_PREFIX}{bbl}"
+
+
+def nearby_geometry_cache_key(bbl: str, distance_feet: float, precise: bool = False) -> str:
+    """Cache key for the nearby landmark/zoning geometry payload."""
+    key = f"{NEARBY_GEOMETRY_PREFIX}{bbl}:{distance_feet}"
+    return f"{key}:precise" if precise else key
+
+
+def address_cache_key(normalized_address: str) -> str:
+    """Cache key for the BBL an address resolved to."""
+    return f"{ADDRESS_PREFIX}{normalized_address.lower()}"
+
+
+def geocode_cache_key(normalized_address: str) -> str:
+    """Cache key for the coordinates an address geocoded to."""
+    return f"{GEOCODE_PREFIX}{normalized_address.lower()}"
+
+
+def coordinate_cache_key(latitude: float, longitude: float) -> str:
+    """Cache key for the BBL of the parcel found near a (lat, lon) bucket."""
+    return f"{COORDINATE_PREFIX}{latitude:.{COORDINATE_PRECISION}f},{longitude:.{COORDINATE_PRECISION}f}"
+
+
+class ResponseCache:
+    """Key/value cache for serialized response bodies."""
+    
+    def __init__(
+        self,
+        url: str = "",
+        ttl_seconds: int = 86400,
+        max_entries: int = 1024,
+        socket_timeout: float = 0.5,
+        socket_connect_timeout: float = 0.5,
+        local_max_ttl_seconds: Optional[int] = None
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.local_max_ttl_seconds = local_max_ttl_seconds
+        # Short timeouts so an unreachable or slow Redis raises RedisError (a miss)
+        # instead of blocking until the OS gives up on the connection
+        self._redis = redis.Redis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_connect_timeout
+        ) if url else None
+        # Non-blocking client for callers running on the event loop (aget/aset)
+        self._async_redis = redis.asyncio.Redis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_connect_timeout
+        ) if url else None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a cached value.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached bytes, or None on a miss (or if the backend is unavailable)
+        """
+        if self._redis is not None:
+            try:
+                return self._redis.get(key)
+            except redis.RedisError as e:
+                logger.warning(f"Cache get failed for {key}: {e}")
+                return None
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: bytes, ttl_seconds: Optional[int] = None) -> None:
+        """
+        Store a value with a TTL.
+        
+        Args:
+            key: Cache key
+            value: Serialized value
+            ttl_seconds: Time to live (default: the cache's configured TTL); capped
+                at local_max_ttl_seconds for the in-process backend
+        """
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        
+        if self._redis is not None:
+            try:
+                self._redis.set(key, value, ex=ttl_seconds)
+            except redis.RedisError as e:
+                logger.warning(f"Cache set failed for {key}: {e}")
+            return
+        
+        if self.local_max_ttl_seconds is not None:
+            ttl_seconds = min(ttl_seconds, self.local_max_ttl_seconds)
+        
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    async def aget(self, key: str) -> Optional[bytes]:
+        """
+        Get a cached value without blocking the event loop.
+        
+        Same semantics as get(); the in-process backend is read directly since
+        it never waits on I/O.
+        """
+        if self._async_redis is None:
+            return self.get(key)
+        
+        try:
+            return await self._async_redis.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Cache get failed for {key}: {e}")
+            return None
+    
+    async def aset(self, key: str, value: bytes, ttl_seconds: Optional[int] = None) -> None:
+        """Store a value with a TTL without blocking the event loop (see set())."""
+        if self._async_redis is None:
+            self.set(key, value, ttl_seconds=ttl_seconds)
+            return
+        
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        try:
+            await self._async_redis.set(key, value, ex=ttl_seconds)
+        except redis.RedisError as e:
+            logger.warning(f"Cache set failed for {key}: {e}")
+    
+    def delete(self, *keys: str) -> None:
+        """Remove keys from the cache."""
+        if not keys:
+            return
+        
+        if self._redis is not None:
+            try:
+                self._redis.delete(*keys)
+            except redis.RedisError as e:
+                logger.warning(f"Cache delete failed: {e}")
+            return
+        
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+    
+    def delete_prefix(self, prefix: str) -> None:
+        """Remove all keys starting with prefix."""
+        if self._redis is not None:
+            try:
+                keys = list(self._redis.scan_iter(match=f"{prefix}*"))
+                if keys:
+                    self._redis.delete(*keys)
+            except redis.RedisError as e:
+                logger.warning(f"Cache delete failed for prefix {prefix}: {e}")
+            return
+        
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+# Singleton instances: geometry payloads (geom:, nearby:) and lookup keys (addr:, geo:, coord:)
+response_cache = ResponseCache(
+    settings.REDIS_URL,
+    settings.CACHE_TTL_SECONDS,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+    local_max_ttl_seconds=settings.LOCAL_CACHE_MAX_TTL_SECONDS
+)
+lookup_cache = ResponseCache(
+    settings.REDIS_URL,
+    settings.CACHE_TTL_SECONDS,
+    max_entries=settings.LOOKUP_CACHE_MAX_ENTRIES,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+    local_max_ttl_seconds=settings.LOCAL_CACHE_MAX_TTL_SECONDS
+)
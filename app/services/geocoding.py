@@ -2,9 +2,13 @@
 Geocoding service for converting addresses to coordinates.
 Supports NYC Geocoding API and Google Maps Geocoding API.
 """
+import asyncio
+import functools
 import httpx
-from typing import Optional, Tuple
+import orjson
+from typing import List, Optional, Sequence, Tuple
 from app.config import settings
+from app.services.cache import ResponseCache, lookup_cache, geocode_cache_key
 
 
 class GeocodingError(Exception):
@@ -12,16 +16,66 @@ class GeocodingError(Exception):
     pass
 
 
+class AddressNotFoundError(GeocodingError):
+    """Raised when the geocoding provider has no match for an address."""
+    pass
+
+
+# Cached marker for addresses the provider could not match
+NOT_FOUND = b""
+
+# Distinct raw addresses whose normalized form is kept in memory
+NORMALIZE_CACHE_SIZE = 100_000
+
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_address(address: str) -> str:
+    """Normalize an address string (see GeocodingService.normalize_address)."""
+    # Remove extra whitespace
+    address = " ".join(address.split())
+    
+    # Ensure NYC is included if not present
+    if "new york" not in address.lower() and "ny" not in address.lower():
+        address = f"{address}, New York, NY"
+    
+    return address
+
+
 class GeocodingService:
     """Service for geocoding addresses to coordinates."""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ResponseCache] = None):
         self.provider = settings.GEOCODING_PROVIDER.lower()
         self.api_key = settings.GEOCODING_API_KEY
+        self.cache = cache if cache is not None else lookup_cache
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        HTTP client shared by all geocode calls on this service.
+        Keeps connections to the provider alive between requests, so repeat
+        calls skip the TCP and TLS handshakes. Created on first use.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def geocode(self, address: str) -> Tuple[float, float]:
         """
         Geocode an address to latitude and longitude.
+        Results are cached by normalized address; addresses with no match are
+        cached for a shorter time.
         
         Args:
             address: Address string (e.g., "123 Main St, New York, NY")
@@ -32,12 +86,116 @@ class GeocodingService:
         Raises:
             GeocodingError: If geocoding fails
         """
-        if self.provider == "nyc":
-            return await self._geocode_nyc(address)
-        elif self.provider == "google":
-            return await self._geocode_google(address)
-        else:
-            raise GeocodingError(f"Unknown geocoding provider: {self.provider}")
+        address = self.normalize_address(address)
+        
+        # Results (including misses) are cached by normalized address
+        cached = await self._get_cached(address)
+        if cached is not None:
+            return cached
+        
+        return await self._geocode_uncached(address)
+    
+    async def geocode_many(
+        self,
+        addresses: Sequence[str],
+        concurrency: Optional[int] = None
+    ) -> List[Optional[Tuple[float, float]]]:
+        """
+        Geocode several addresses concurrently.
+        Cached addresses are answered up front; only misses are sent to the
+        provider, at most `concurrency` at a time, and each distinct address
+        is requested once.
+        
+        Args:
+            addresses: Address strings
+            concurrency: Maximum number of provider requests in flight
+                (default: GEOCODING_CONCURRENCY)
+        
+        Returns:
+            (latitude, longitude) per address, in input order, or None where
+            geocoding failed
+        """
+        normalized = [self.normalize_address(address) for address in addresses]
+        results = {}
+        
+        # Probe the cache for all distinct addresses at once
+        distinct = list(dict.fromkeys(normalized))
+        cached = await asyncio.gather(
+            *[self._get_cached(address) for address in distinct],
+            return_exceptions=True
+        )
+        
+        misses = []
+        for address, value in zip(distinct, cached):
+            if isinstance(value, AddressNotFoundError):
+                results[address] = None
+            elif isinstance(value, BaseException):
+                raise value
+            else:
+                results[address] = value
+                if value is None:
+                    misses.append(address)
+        
+        semaphore = asyncio.Semaphore(concurrency or settings.GEOCODING_CONCURRENCY)
+        
+        async def geocode_one(address: str) -> Optional[Tuple[float, float]]:
+            async with semaphore:
+                try:
+                    return await self._geocode_uncached(address)
+                except GeocodingError:
+                    return None
+        
+        geocoded = await asyncio.gather(*[geocode_one(address) for address in misses])
+        results.update(zip(misses, geocoded))
+        
+        return [results[address] for address in normalized]
+    
+    async def _geocode_uncached(self, address: str) -> Tuple[float, float]:
+        """
+        Geocode a normalized address with the provider and cache the result
+        (or the miss).
+        
+        Raises:
+            GeocodingError: If geocoding fails
+        """
+        cache_key = geocode_cache_key(address)
+        
+        try:
+            if self.provider == "nyc":
+                lat, lon = await self._geocode_nyc(address)
+            elif self.provider == "google":
+                lat, lon = await self._geocode_google(address)
+            else:
+                raise GeocodingError(f"Unknown geocoding provider: {self.provider}")
+        except AddressNotFoundError:
+            # Short TTL so a repeatedly requested bad address doesn't hit the API every time
+            await self.cache.aset(cache_key, NOT_FOUND, ttl_seconds=settings.GEOCODE_NOT_FOUND_TTL_SECONDS)
+            raise
+        
+        await self.cache.aset(
+            cache_key,
+            f"{lat!r},{lon!r}".encode(),
+            ttl_seconds=settings.GEOCODE_CACHE_TTL_SECONDS
+        )
+        return lat, lon
+    
+    async def _get_cached(self, address: str) -> Optional[Tuple[float, float]]:
+        """
+        Look up a normalized address in the geocode cache.
+        
+        Returns:
+            Cached (latitude, longitude), or None on a miss
+        
+        Raises:
+            AddressNotFoundError: If the address is cached as having no match
+        """
+        cached = await self.cache.aget(geocode_cache_key(address))
+        if cached == NOT_FOUND:
+            raise AddressNotFoundError(f"No results found for address: {address}")
+        if cached is None:
+            return None
+        lat, lon = cached.split(b",")
+        return float(lat), float(lon)
     
     async def _geocode_nyc(self, address: str) -> Tuple[float, float]:
         """
@@ -55,26 +213,25 @@ class GeocodingService:
             "format": "json"
         }
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                response = await client.get(base_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                if not data.get("result", {}).get("addressMatches"):
-                    raise GeocodingError(f"No results found for address: {address}")
-                
-                match = data["result"]["addressMatches"][0]
-                coordinates = match["coordinates"]
-                
-                return (
-                    float(coordinates["y"]),  # latitude
-                    float(coordinates["x"])   # longitude
-                )
-            except httpx.HTTPError as e:
-                raise GeocodingError(f"HTTP error during geocoding: {str(e)}")
-            except (KeyError, ValueError, IndexError) as e:
-                raise GeocodingError(f"Error parsing geocoding response: {str(e)}")
+        try:
+            response = await self.client.get(base_url, params=params)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            
+            if not data.get("result", {}).get("addressMatches"):
+                raise AddressNotFoundError(f"No results found for address: {address}")
+            
+            match = data["result"]["addressMatches"][0]
+            coordinates = match["coordinates"]
+            
+            return (
+                float(coordinates["y"]),  # latitude
+                float(coordinates["x"])   # longitude
+            )
+        except httpx.HTTPError as e:
+            raise GeocodingError(f"HTTP error during geocoding: {str(e)}")
+        except (KeyError, ValueError, IndexError) as e:
+            raise GeocodingError(f"Error parsing geocoding response: {str(e)}")
     
     async def _geocode_google(self, address: str) -> Tuple[float, float]:
         """
@@ -91,33 +248,36 @@ class GeocodingService:
             "key": self.api_key
         }
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                response = await client.get(base_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("status") != "OK":
-                    error_msg = data.get("error_message", "Unknown error")
-                    raise GeocodingError(f"Google Geocoding API error: {error_msg}")
-                
-                if not data.get("results"):
-                    raise GeocodingError(f"No results found for address: {address}")
-                
-                location = data["results"][0]["geometry"]["location"]
-                
-                return (
-                    float(location["lat"]),
-                    float(location["lng"])
-                )
-            except httpx.HTTPError as e:
-                raise GeocodingError(f"HTTP error during geocoding: {str(e)}")
-            except (KeyError, ValueError, IndexError) as e:
-                raise GeocodingError(f"Error parsing geocoding response: {str(e)}")
+        try:
+            response = await self.client.get(base_url, params=params)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            
+            if data.get("status") == "ZERO_RESULTS":
+                raise AddressNotFoundError(f"No results found for address: {address}")
+            
+            if data.get("status") != "OK":
+                error_msg = data.get("error_message", "Unknown error")
+                raise GeocodingError(f"Google Geocoding API error: {error_msg}")
+            
+            if not data.get("results"):
+                raise AddressNotFoundError(f"No results found for address: {address}")
+            
+            location = data["results"][0]["geometry"]["location"]
+            
+            return (
+                float(location["lat"]),
+                float(location["lng"])
+            )
+        except httpx.HTTPError as e:
+            raise GeocodingError(f"HTTP error during geocoding: {str(e)}")
+        except (KeyError, ValueError, IndexError) as e:
+            raise GeocodingError(f"Error parsing geocoding response: {str(e)}")
     
     def normalize_address(self, address: str) -> str:
         """
         Normalize address string for better geocoding results.
+        Results are memoized, since the same addresses repeat across requests.
         
         Args:
             address: Raw address string
@@ -125,14 +285,7 @@ class GeocodingService:
         Returns:
             Normalized address string
         """
-        # Remove extra whitespace
-        address = " ".join(address.split())
-        
-        # Ensure NYC is included if not present
-        if "new york" not in address.lower() and "ny" not in address.lower():
-            address = f"{address}, New York, NY"
-        
-        return address
+        return _normalize_address(address)
 
 
 # Singleton instance
@@ -2,17 +2,64 @@
 Spatial query service for PostGIS operations.
 Handles spatial queries like finding nearby landmarks, intersecting zoning districts, etc.
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload, load_only
+from sqlalchemy import func, text, select, false
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
 from geoalchemy2 import Geometry
 from geoalchemy2.functions import ST_DWithin, ST_Intersects, ST_Distance, ST_GeomFromText
-from typing import List, Optional, Tuple
-from shapely.geometry import Point
+from typing import Dict, List, Optional, Sequence, Tuple
+import uuid
 
 from app.models.property import Property
-from app.models.zoning import ZoningDistrict, PropertyZoning
-from app.models.landmark import Landmark
-from app.utils.postgis import create_point, within_distance, calculate_distance, intersects
+from app.models.zoning import ZoningDistrict, ZoningDistrictSubdivision, ZoningType, PropertyZoning
+from app.models.landmark import Landmark, LandmarkType
+from app.config import settings
+from app.services.cache import lookup_cache, coordinate_cache_key
+from app.utils.postgis import create_point, within_distance, calculate_distance, intersects, feet_to_meters, expand_meters
+
+
+# Static statements are built once at import and reused for every call
+
+# Property containing each (lat, lon) pair, with the point's 1-based position
+_BBLS_BY_COORDINATES_SQL = text("""
+    SELECT pt.ord, p.bbl
+    FROM unnest(CAST(:lats AS float8[]), CAST(:lons AS float8[]))
+         WITH ORDINALITY AS pt(lat, lon, ord)
+    CROSS JOIN LATERAL (
+        SELECT bbl
+        FROM properties
+        WHERE ST_Contains(geometry, ST_SetSRID(ST_MakePoint(pt.lon, pt.lat), 4326))
+        LIMIT 1
+    ) p
+""")
+
+# One property's zoning relationships, largest overlap primary (see
+# SpatialService.create_property_zoning_relationships)
+_CREATE_PROPERTY_ZONING_SQL = text("""
+    INSERT INTO property_zoning (id, property_id, zoning_district_id, is_primary)
+    SELECT
+        gen_random_uuid(),
+        CAST(:property_id AS uuid),
+        overlaps.zoning_district_id,
+        row_number() OVER (ORDER BY overlaps.area DESC) = 1
+        AND NOT EXISTS (
+            SELECT 1 FROM property_zoning pz
+            WHERE pz.property_id = CAST(:property_id AS uuid) AND pz.is_primary
+        )
+    FROM (
+        SELECT
+            z.id AS zoning_district_id,
+            CASE
+                WHEN ST_CoveredBy(p.geometry, z.geometry) THEN ST_Area(p.geometry)
+                WHEN ST_CoveredBy(z.geometry, p.geometry) THEN ST_Area(z.geometry)
+                ELSE ST_Area(ST_Intersection(p.geometry, z.geometry))
+            END AS area
+        FROM (SELECT geometry FROM properties WHERE id = CAST(:property_id AS uuid)) p
+        JOIN zoning_districts z
+          ON z.geometry && p.geometry AND ST_Intersects(p.geometry, z.geometry)
+    ) overlaps
+    ON CONFLICT (property_id, zoning_district_id) DO NOTHING
+""")
 
 
 class SpatialService:
@@ -33,9 +80,250 @@ class SpatialService:
         """
         return self.db.query(Property).filter(Property.bbl == bbl).first()
     
+    def get_property_with_context(
+        self,
+        bbl: str,
+        distance_feet: float = 150.0
+    ) -> Optional[Tuple[Property, List[dict], List[dict]]]:
+        """
+        Find a property by BBL together with its zoning districts and nearby
+        landmarks in a single query.
+        
+        Zoning districts come from the PropertyZoning junction table, falling back
+        to spatial intersection if no relationships exist.
+        
+        Args:
+            bbl: BBL string (e.g., "1000120001")
+            distance_feet: Landmark search distance in feet (default: 150)
+        
+        Returns:
+            Tuple of (Property, zoning districts, nearby landmarks), or None if not found.
+            Zoning districts are dicts with code, type and is_primary; landmarks are
+            dicts with name, landmark_type and distance_feet.
+        """
+        return self._get_property_with_context(Property.bbl == bbl, distance_feet)
+    
+    def get_property_with_context_at(
+        self,
+        latitude: float,
+        longitude: float,
+        distance_feet: float = 150.0
+    ) -> Optional[Tuple[Property, List[dict], List[dict]]]:
+        """
+        Find the property containing a point together with its zoning districts
+        and nearby landmarks in a single query.
+        
+        Args:
+            latitude: Latitude in decimal degrees
+            longitude: Longitude in decimal degrees
+            distance_feet: Landmark search distance in feet (default: 150)
+        
+        Returns:
+            Same as get_property_with_context, or None if no property contains the point
+        """
+        contains = func.ST_Contains(Property.geometry, create_point(latitude, longitude))
+        key = coordinate_cache_key(latitude, longitude)
+        
+        # Parcel found for a nearby point before; confirmed to contain this one too
+        cached_bbl = lookup_cache.get(key)
+        if cached_bbl is not None:
+            context = self._get_property_with_context(
+                (Property.bbl == cached_bbl.decode()) & contains,
+                distance_feet
+            )
+            if context:
+                return context
+        
+        context = self._get_property_with_context(contains, distance_feet)
+        if context:
+            lookup_cache.set(key, context[0].bbl.encode(), ttl_seconds=settings.COORDINATE_CACHE_TTL_SECONDS)
+        return context
+    
+    def get_property_with_context_by_address(
+        self,
+        address: str,
+        distance_feet: float = 150.0
+    ) -> Optional[Tuple[Property, List[dict], List[dict]]]:
+        """
+        Find a property by address (same matching as find_property_by_address)
+        together with its zoning districts and nearby landmarks in a single query.
+        
+        Args:
+            address: Property address
+            distance_feet: Landmark search distance in feet (default: 150)
+        
+        Returns:
+            Same as get_property_with_context, or None if no address matches
+        """
+        return self._get_property_with_context(
+            Property.address.ilike(f"%{address}%"),
+            distance_feet,
+            order_by=func.similarity(Property.address, address).desc()
+        )
+    
+    def get_properties_with_context(
+        self,
+        bbls: Sequence[str],
+        distance_feet: float = 150.0
+    ) -> Dict[str, Tuple[Property, List[dict], List[dict]]]:
+        """
+        Find several properties by BBL together with their zoning districts and
+        nearby landmarks in a single query.
+        
+        Args:
+            bbls: BBL strings
+            distance_feet: Landmark search distance in feet (default: 150)
+        
+        Returns:
+            Dictionary of BBL to (Property, zoning districts, nearby landmarks),
+            as returned by get_property_with_context; missing BBLs are left out
+        """
+        if not bbls:
+            return {}
+        
+        rows = self._property_context_query(distance_feet).filter(Property.bbl.in_(set(bbls))).all()
+        return {row[0].bbl: self._property_context(row) for row in rows}
+    
+    def find_bbls_by_coordinates(
+        self,
+        coordinates: Sequence[Tuple[float, float]]
+    ) -> List[Optional[str]]:
+        """
+        Find the properties containing several points in a single query.
+        
+        Args:
+            coordinates: (latitude, longitude) pairs
+        
+        Returns:
+            BBL of the property containing each point, in input order, or None
+            where no property contains the point
+        """
+        if not coordinates:
+            return []
+        
+        latitudes, longitudes = zip(*coordinates)
+        result = self.db.execute(
+            _BBLS_BY_COORDINATES_SQL,
+            {"lats": list(latitudes), "lons": list(longitudes)}
+        )
+        
+        bbls: List[Optional[str]] = [None] * len(coordinates)
+        for ordinal, bbl in result:
+            bbls[ordinal - 1] = bbl
+        return bbls
+    
+    def _get_property_with_context(
+        self,
+        condition,
+        distance_feet: float,
+        order_by=None
+    ) -> Optional[Tuple[Property, List[dict], List[dict]]]:
+        """Run the property + zoning + landmarks query for the first property matching condition."""
+        query = self._property_context_query(distance_feet).filter(condition)
+        if order_by is not None:
+            query = query.order_by(order_by)
+        row = query.first()
+        
+        if row is None:
+            return None
+        
+        return self._property_context(row)
+    
+    def _property_context_query(self, distance_feet: float):
+        """Query for properties with their zoning districts and nearby landmarks as JSON columns."""
+        # Stored geography columns (GiST-indexed), not per-row casts
+        property_geog = Property.geog
+        landmark_geog = Landmark.geog
+        
+        def zoning_object(is_primary):
+            return func.json_build_object(
+                "code", ZoningDistrict.zoning_code,
+                "type", ZoningDistrict.zoning_type,
+                "is_primary", is_primary
+            )
+        
+        # Zoning districts from the junction table, primary first
+        assigned_zoning = (
+            select(func.json_agg(
+                aggregate_order_by(zoning_object(PropertyZoning.is_primary), PropertyZoning.is_primary.desc()),
+                type_=JSON
+            ))
+            .select_from(PropertyZoning)
+            .join(ZoningDistrict, ZoningDistrict.id == PropertyZoning.zoning_district_id)
+            .where(PropertyZoning.property_id == Property.id)
+            .correlate(Property)
+            .scalar_subquery()
+        )
+        
+        # Fallback to spatial intersection (only evaluated if no relationships exist)
+        intersecting_zoning = (
+            select(func.json_agg(zoning_object(false()), type_=JSON))
+            .where(
+                ZoningDistrict.geometry.op("&&")(Property.geometry),
+                ST_Intersects(ZoningDistrict.geometry, Property.geometry)
+            )
+            .correlate(Property)
+            .scalar_subquery()
+        )
+        
+        # Nearby landmarks, closest first
+        distance_meters = ST_Distance(landmark_geog, property_geog)
+        nearby_landmarks = (
+            select(func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "name", Landmark.name,
+                        "landmark_type", Landmark.landmark_type,
+                        "distance_feet", distance_meters / 0.3048
+                    ),
+                    distance_meters
+                ),
+                type_=JSON
+            ))
+            .where(
+                Landmark.geometry.op("&&")(expand_meters(Property.geometry, feet_to_meters(distance_feet))),
+                ST_DWithin(landmark_geog, property_geog, feet_to_meters(distance_feet))
+            )
+            .correlate(Property)
+            .scalar_subquery()
+        )
+        
+        return self.db.query(
+            Property,
+            func.coalesce(assigned_zoning, intersecting_zoning).label("zoning"),
+            nearby_landmarks.label("landmarks")
+        )
+    
+    def _property_context(self, row) -> Tuple[Property, List[dict], List[dict]]:
+        """Convert a _property_context_query row into (Property, zoning districts, landmarks)."""
+        property_obj, zoning_rows, landmark_rows = row
+        
+        # Enum columns come back as member names
+        zoning_districts = [
+            {
+                "code": zd["code"],
+                "type": ZoningType[zd["type"]].value,
+                "is_primary": zd["is_primary"],
+            }
+            for zd in zoning_rows or []
+        ]
+        landmarks = [
+            {
+                "name": lm["name"],
+                "landmark_type": LandmarkType[lm["landmark_type"]].value,
+                "distance_feet": lm["distance_feet"],
+            }
+            for lm in landmark_rows or []
+        ]
+        
+        return property_obj, zoning_districts, landmarks
+    
     def find_property_by_address(self, address: str) -> Optional[Property]:
         """
-        Find a property by address (exact match).
+        Find a property by address (substring match).
+        
+        The ILIKE filter is served by the trigram index on properties.address;
+        when several properties match, the most similar address wins.
         
         Args:
             address: Property address
@@ -43,7 +331,12 @@ class SpatialService:
         Returns:
             Property object or None if not found
         """
-        return self.db.query(Property).filter(Property.address.ilike(f"%{address}%")).first()
+        return (
+            self.db.query(Property)
+            .filter(Property.address.ilike(f"%{address}%"))
+            .order_by(func.similarity(Property.address, address).desc())
+            .first()
+        )
     
     def find_property_by_coordinates(
         self,
@@ -53,6 +346,9 @@ class SpatialService:
         """
         Find a property by coordinates using spatial intersection.
         
+        The parcel found for each ~11 m coordinate bucket is cached; later
+        points in the same bucket check that parcel first.
+        
         Args:
             latitude: Latitude in decimal degrees
             longitude: Longitude in decimal degrees
@@ -60,48 +356,73 @@ class SpatialService:
         Returns:
             Property object that contains the point, or None if not found
         """
-        point = create_point(latitude, longitude)
+        contains = func.ST_Contains(Property.geometry, create_point(latitude, longitude))
+        key = coordinate_cache_key(latitude, longitude)
+        
+        # Parcel found for a nearby point before: a BBL index lookup plus a
+        # single containment check instead of a spatial index search
+        cached_bbl = lookup_cache.get(key)
+        if cached_bbl is not None:
+            property = self.db.query(Property).filter(
+                Property.bbl == cached_bbl.decode(),
+                contains
+            ).first()
+            if property:
+                return property
         
         # Find property that contains the point
-        property = self.db.query(Property).filter(
-            func.ST_Contains(Property.geometry, point)
-        ).first()
+        property = self.db.query(Property).filter(contains).first()
         
+        if property:
+            lookup_cache.set(key, property.bbl.encode(), ttl_seconds=settings.COORDINATE_CACHE_TTL_SECONDS)
         return property
     
     def find_nearby_landmarks(
         self,
         geometry: Geometry,
-        distance_feet: float = 150.0
+        distance_feet: float = 150.0,
+        limit: Optional[int] = None
     ) -> List[Tuple[Landmark, float]]:
         """
         Find landmarks within a specified distance of a geometry.
+        Landmarks are loaded without their geometry columns; accessing
+        `geometry` on one loads it separately.
         
         Args:
             geometry: PostGIS geometry (point or polygon)
             distance_feet: Distance in feet (default: 150)
+            limit: Maximum number of landmarks to return (default: all)
         
         Returns:
-            List of tuples (Landmark, distance_in_feet)
+            List of tuples (Landmark, distance_in_feet), closest first
         """
         # Convert geometry to geography for accurate distance calculations
-        geom_geog = func.cast(geometry, func.geography)
-        landmark_geog = func.cast(Landmark.geometry, func.geography)
+        geom_geog = func.geography(geometry)
+        landmark_geog = Landmark.geog
         
         # Calculate distance in meters, then convert to feet
         distance_meters = func.ST_Distance(geom_geog, landmark_geog)
         
-        # Find landmarks within distance
-        landmarks = self.db.query(
+        # Find landmarks within distance: the bounding-box test uses the GiST
+        # index on landmarks.geometry, the geography test refines the candidates
+        query = self.db.query(
             Landmark,
             distance_meters.label('distance_meters')
+        ).options(
+            load_only(Landmark.name, Landmark.landmark_type, Landmark.designation_date)
         ).filter(
+            Landmark.geometry.op("&&")(expand_meters(geometry, feet_to_meters(distance_feet))),
             ST_DWithin(
                 landmark_geog,
                 geom_geog,
-                distance_feet * 0.3048  # Convert feet to meters
+                feet_to_meters(distance_feet)
             )
-        ).all()
+        ).order_by(distance_meters)
+        
+        if limit is not None:
+            query = query.limit(limit)
+        
+        landmarks = query.all()
         
         # Convert to list of tuples with distance in feet
         result = []
@@ -113,32 +434,41 @@ class SpatialService:
     
     def get_zoning_districts(
         self,
-        geometry: Geometry
+        geometry: Geometry,
+        property_id: Optional[uuid.UUID] = None
     ) -> List[Tuple[ZoningDistrict, bool]]:
         """
         Get all zoning districts that intersect with a geometry.
         
         Args:
             geometry: PostGIS geometry (point or polygon)
+            property_id: Property whose PropertyZoning rows mark the primary
+                district (default: none are primary)
         
         Returns:
             List of tuples (ZoningDistrict, is_primary)
         """
-        # Find intersecting zoning districts
-        districts = self.db.query(ZoningDistrict).filter(
+        if property_id is None:
+            is_primary = false()
+        else:
+            is_primary = func.coalesce(PropertyZoning.is_primary, false())
+        
+        # Find intersecting zoning districts: && is the GiST bounding-box probe,
+        # ST_Intersects the exact test on the candidates
+        query = self.db.query(ZoningDistrict, is_primary).filter(
+            ZoningDistrict.geometry.op("&&")(geometry),
             ST_Intersects(ZoningDistrict.geometry, geometry)
-        ).all()
+        )
         
-        # Check which ones are primary for the property (if applicable)
-        result = []
-        for district in districts:
-            # Try to find if this is a primary zoning for any property
-            # For now, we'll mark the first one as primary
-            # In a real implementation, you'd check PropertyZoning table
-            is_primary = False
-            result.append((district, is_primary))
+        # Primary flag from the property's relationships, if any
+        if property_id is not None:
+            query = query.outerjoin(
+                PropertyZoning,
+                (PropertyZoning.zoning_district_id == ZoningDistrict.id)
+                & (PropertyZoning.property_id == property_id)
+            )
         
-        return result
+        return [(district, bool(primary)) for district, primary in query.all()]
     
     def get_property_zoning_districts(
         self,
@@ -153,8 +483,13 @@ class SpatialService:
         Returns:
             List of tuples (ZoningDistrict, is_primary)
         """
-        property_zoning = self.db.query(PropertyZoning).filter(
+        # Districts are loaded with one extra IN query instead of one per row
+        property_zoning = self.db.query(PropertyZoning).options(
+            selectinload(PropertyZoning.zoning_district)
+        ).filter(
             PropertyZoning.property_id == property.id
+        ).order_by(
+            PropertyZoning.is_primary.desc()
         ).all()
         
         result = []
@@ -181,17 +516,14 @@ class SpatialService:
         # Find properties that touch or are very close to the geometry
         # Using ST_Touches for exact adjacency or ST_DWithin for near-adjacency
         properties = self.db.query(Property).filter(
+            Property.geometry.op("&&")(geometry),
             func.ST_Touches(Property.geometry, geometry)
         ).limit(limit).all()
         
         # If no exact touches, try very close (within 1 foot)
         if not properties:
             properties = self.db.query(Property).filter(
-                ST_DWithin(
-                    func.cast(Property.geometry, func.geography),
-                    func.cast(geometry, func.geography),
-                    0.3048  # 1 foot in meters
-                )
+                within_distance(Property.geog, geometry, 1.0)
             ).limit(limit).all()
         
         return properties
@@ -203,33 +535,108 @@ class SpatialService:
         """
         Create PropertyZoning relationships by spatially intersecting
         property geometry with zoning district geometries.
+        The district with the largest overlap is marked primary.
         
         Args:
             property: Property object
         """
-        # Find intersecting zoning districts
-        districts = self.db.query(ZoningDistrict).filter(
-            ST_Intersects(ZoningDistrict.geometry, property.geometry)
-        ).all()
+        # One INSERT ... SELECT: the property geometry is read server-side and
+        # is the constant argument of every ST_Intersects, so PostGIS prepares
+        # it once. The district with the largest overlap becomes primary unless
+        # the property already has one; existing pairs are left untouched.
+        self.db.execute(
+            _CREATE_PROPERTY_ZONING_SQL,
+            {"property_id": str(property.id)}
+        )
         
-        if not districts:
-            return
+        self.db.commit()
+    
+    def bulk_create_property_zoning_relationships(
+        self,
+        property_ids: Optional[Sequence[uuid.UUID]] = None
+    ) -> int:
+        """
+        Create PropertyZoning relationships for many properties in one statement.
         
-        # Create relationships
-        # First district is marked as primary
-        for i, district in enumerate(districts):
-            # Check if relationship already exists
-            existing = self.db.query(PropertyZoning).filter(
-                PropertyZoning.property_id == property.id,
-                PropertyZoning.zoning_district_id == district.id
-            ).first()
-            
-            if not existing:
-                property_zoning = PropertyZoning(
-                    property_id=property.id,
-                    zoning_district_id=district.id,
-                    is_primary=(i == 0)  # First one is primary
-                )
-                self.db.add(property_zoning)
+        Properties are spatially joined with the subdivided zoning district
+        geometries inside PostGIS. Properties that already have relationships
+        are skipped. The district with the largest overlap is marked primary;
+        the overlap is only computed with ST_Intersection when neither geometry
+        covers the other.
+        
+        Args:
+            property_ids: Properties to process (default: all properties)
+        
+        Returns:
+            Number of relationships created
+        """
+        property_filter = ""
+        params = {}
+        if property_ids is not None:
+            property_filter = "AND p.id = ANY(CAST(:property_ids AS uuid[]))"
+            params["property_ids"] = [str(property_id) for property_id in property_ids]
+        
+        result = self.db.execute(
+            text(f"""
+                INSERT INTO property_zoning (id, property_id, zoning_district_id, is_primary)
+                SELECT
+                    gen_random_uuid(),
+                    overlaps.property_id,
+                    overlaps.zoning_district_id,
+                    row_number() OVER (
+                        PARTITION BY overlaps.property_id
+                        ORDER BY overlaps.area DESC
+                    ) = 1
+                FROM (
+                    SELECT
+                        p.id AS property_id,
+                        zds.zoning_district_id,
+                        sum(
+                            CASE
+                                WHEN ST_CoveredBy(p.geometry, zds.geometry) THEN ST_Area(p.geometry)
+                                WHEN ST_CoveredBy(zds.geometry, p.geometry) THEN ST_Area(zds.geometry)
+                                ELSE ST_Area(ST_Intersection(p.geometry, zds.geometry))
+                            END
+                        ) AS area
+                    FROM properties p
+                    JOIN zoning_district_subdivisions zds
+                      ON zds.geometry && p.geometry
+                     AND ST_Intersects(zds.geometry, p.geometry)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM property_zoning pz WHERE pz.property_id = p.id
+                    )
+                    {property_filter}
+                    GROUP BY p.id, zds.zoning_district_id
+                ) overlaps
+            """),
+            params
+        )
+        self.db.commit()
+        return result.rowcount
+    
+    def refresh_zoning_district_subdivisions(
+        self,
+        max_vertices: int = 256
+    ) -> None:
+        """
+        Rebuild the subdivided zoning district geometries used by intersection queries.
+        Should be run after zoning districts are imported or changed.
+        
+        Args:
+            max_vertices: Maximum number of vertices per subdivided piece
+        """
+        table = ZoningDistrictSubdivision.__tablename__
+        self.db.execute(text(f"DELETE FROM {table}"))
+        self.db.execute(
+            text(f"""
+                INSERT INTO {table} (id, zoning_district_id, geometry)
+                SELECT gen_random_uuid(), id, ST_Subdivide(geometry, :max_vertices)
+                FROM zoning_districts
+            """),
+            {"max_vertices": max_vertices}
+        )
         
+        # Fresh statistics so the planner sizes both sides of the spatial joins
+        # correctly and drives them from the smaller input
+        self.db.execute(text(f"ANALYZE {table}"))
         self.db.commit()
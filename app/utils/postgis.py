@@ -1,10 +1,9 @@
 """
 PostGIS utility functions for spatial operations.
 """
-from geoalchemy2 import Geometry
-from geoalchemy2.functions import ST_DWithin, ST_Intersects, ST_Distance, ST_GeomFromText
-from sqlalchemy import func
-from shapely.geometry import Point
+from geoalchemy2 import Geometry, Geography
+from geoalchemy2.functions import ST_DWithin, ST_Intersects, ST_Distance
+from sqlalchemy import Float, func
 from typing import Tuple
 
 
@@ -20,7 +19,9 @@ def create_point(latitude: float, longitude: float, srid: int = 4326) -> func:
     Returns:
         PostGIS geometry function
     """
-    return ST_GeomFromText(f'POINT({longitude} {latitude})', srid)
+    # Coordinates are bound as floats, so PostGIS doesn't parse WKT text and
+    # the compiled statement is shared by every point
+    return func.ST_SetSRID(func.ST_MakePoint(float(longitude), float(latitude)), srid)
 
 
 def feet_to_meters(feet: float) -> float:
@@ -33,17 +34,41 @@ def meters_to_feet(meters: float) -> float:
     return meters / 0.3048
 
 
+def expand_meters(geometry: Geometry, distance_meters: float) -> func:
+    """
+    Expand a geometry's bounding box by roughly distance_meters on each side.
+    
+    The box is in degrees so it can be matched with `&&` against the GiST index
+    on a geometry column. 110 km per degree (with a cos(latitude) correction on
+    the x axis) under-estimates both axes, so the box never clips a match.
+    
+    Args:
+        geometry: PostGIS geometry in EPSG:4326
+        distance_meters: Distance in meters
+    
+    Returns:
+        PostGIS box geometry function
+    """
+    degrees = distance_meters / 110000.0
+    return func.ST_Expand(
+        geometry,
+        degrees / func.cos(func.radians(func.ST_Y(func.ST_Centroid(geometry))), type_=Float),
+        degrees
+    )
+
+
 def within_distance(
-    geometry_column: Geometry,
-    point: func,
+    geography_column: Geography,
+    geometry: func,
     distance_feet: float
 ) -> func:
     """
-    Check if geometry is within distance of a point using PostGIS geography.
+    Check if a stored geography is within distance of a geometry.
     
     Args:
-        geometry_column: PostGIS geometry column
-        point: PostGIS POINT geometry
+        geography_column: Stored PostGIS geography column (e.g. Landmark.geog),
+            so ST_DWithin can use its GiST index
+        geometry: PostGIS geometry (e.g. a POINT), converted to geography once
         distance_feet: Distance in feet
     
     Returns:
@@ -51,25 +76,25 @@ def within_distance(
     """
     distance_meters = feet_to_meters(distance_feet)
     return ST_DWithin(
-        func.cast(geometry_column, func.geography),
-        func.cast(point, func.geography),
+        geography_column,
+        func.geography(geometry),
         distance_meters
     )
 
 
 def calculate_distance(
-    geometry1: Geometry,
-    geometry2: Geometry
+    geography_column: Geography,
+    geometry: Geometry
 ) -> func:
     """
-    Calculate distance between two geometries in meters.
+    Calculate distance between a stored geography and a geometry in meters.
     
     Returns:
         PostGIS distance function (returns meters)
     """
     return ST_Distance(
-        func.cast(geometry1, func.geography),
-        func.cast(geometry2, func.geography)
+        geography_column,
+        func.geography(geometry)
     )
 
 
@@ -1,28 +1,106 @@
 """
 Pytest configuration and fixtures.
 """
+import os
+
 import pytest
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.orm import Session
 from fastapi.testclient import TestClient
 
 from app.database import Base, get_db
-from app.main import app
+from app.models.property import Property, Borough
+from app.main import app as fastapi_app
 from app.config import settings
+from tests.geometries import PROPERTY_EWKT
 
 
 # Create test database URL
 TEST_DATABASE_URL = settings.DATABASE_URL.replace("nyc_zoning", "nyc_zoning_test")
 
+# pytest-xdist worker id ("gw0", "gw1", ...), unset when tests run in one process
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+
+
+def pytest_addoption(parser):
+    """Add the --run-network and --check-latency options."""
+    parser.addoption(
+        "--run-network",
+        action="store_true",
+        default=False,
+        help="run tests that hit external services"
+    )
+    parser.addoption(
+        "--check-latency",
+        action="store_true",
+        default=False,
+        help="assert the benchmarks' absolute p95 latency budgets"
+    )
+
+
+def pytest_configure(config):
+    """Register custom markers."""
+    config.addinivalue_line("markers", "network: hits external services")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip network tests unless --run-network is given."""
+    if config.getoption("--run-network"):
+        return
+    
+    skip_network = pytest.mark.skip(reason="network disabled (use --run-network)")
+    for item in items:
+        if "network" in item.keywords:
+            item.add_marker(skip_network)
+
+
+@pytest.fixture(scope="session")
+def test_database_url():
+    """
+    URL of the database this test process uses.
+    
+    Under pytest-xdist (`pytest -n auto`) each worker gets its own database,
+    created next to the main test database and dropped at the end of the
+    session, so workers never share tables.
+    """
+    if XDIST_WORKER is None:
+        yield TEST_DATABASE_URL
+        return
+    
+    url = make_url(TEST_DATABASE_URL)
+    worker_database = f"{url.database}_{XDIST_WORKER}"
+    admin_engine = create_engine(TEST_DATABASE_URL, isolation_level="AUTOCOMMIT")
+    
+    with admin_engine.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{worker_database}"'))
+        conn.execute(text(f'CREATE DATABASE "{worker_database}"'))
+    
+    yield url.set(database=worker_database).render_as_string(hide_password=False)
+    
+    with admin_engine.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{worker_database}"'))
+    admin_engine.dispose()
+
 
 @pytest.fixture(scope="session")
-def test_engine():
-    """Create test database engine."""
-    engine = create_engine(TEST_DATABASE_URL)
+def test_engine(test_database_url):
+    """Create test database engine, with the same driver options as app.database.engine."""
+    engine = create_engine(
+        test_database_url,
+        query_cache_size=1200,
+        executemany_mode="values_plus_batch",
+        insertmanyvalues_page_size=10000,
+        executemany_batch_page_size=1000,
+        # Test data is disposable; don't wait for WAL flushes on schema setup commits
+        connect_args={"options": "-c synchronous_commit=off"},
+    )
     
-    # Enable PostGIS extension
+    # Enable PostGIS and pg_trgm extensions
     with engine.connect() as conn:
         conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         conn.commit()
     
     # Create all tables
@@ -37,29 +115,80 @@ def test_engine():
 
 @pytest.fixture(scope="function")
 def db_session(test_engine):
-    """Create a database session for testing."""
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
-    session = SessionLocal()
+    """
+    Create a database session for testing.
+    
+    The session is joined to an outer transaction that is rolled back after the
+    test. Fixtures flush rather than commit; commits made by the code under test
+    only release a SAVEPOINT, so every test starts from the empty schema created
+    once per session.
+    """
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection,
+        autoflush=False,
+        join_transaction_mode="create_savepoint"
+    )
+    
+    fastapi_app.dependency_overrides[get_db] = lambda: session
     
     try:
         yield session
     finally:
-        session.rollback()
+        fastapi_app.dependency_overrides.clear()
         session.close()
+        transaction.rollback()
+        connection.close()
 
 
-@pytest.fixture(scope="function")
-def client(db_session):
-    """Create a test client with database override."""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+@pytest.fixture
+def sample_property(db_session):
+    """Create a sample property (PROPERTY_EWKT parcel) for testing."""
+    property_obj = Property(
+        bbl="1000120001",
+        address="123 Test St, Manhattan",
+        borough=Borough.MANHATTAN,
+        block=1,
+        lot=1,
+        geometry=PROPERTY_EWKT,
+        land_area=5000.0,
+        year_built=2000,
+        num_floors=5,
+        units_res=10,
+        units_total=10,
+        assessed_value=1000000.0
+    )
     
-    app.dependency_overrides[get_db] = override_get_db
+    db_session.add(property_obj)
+    db_session.flush()
+    db_session.refresh(property_obj)
     
+    return property_obj
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The FastAPI application, shared by all tests."""
+    return fastapi_app
+
+
+@pytest.fixture(scope="session")
+def test_client(app):
+    """Test client built (and started up) once per session."""
     with TestClient(app) as test_client:
         yield test_client
-    
-    app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="function")
+def client(test_client, db_session):
+    """Shared test client with get_db overridden to this test's session."""
+    return test_client
+
+
+@pytest_asyncio.fixture
+async def async_client(app, db_session):
+    """Async HTTP client calling the app in-process, with get_db overridden."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as async_client:
+        yield async_client
@@ -0,0 +1,22 @@
+"""
+Test geometries as EWKT strings, built once and bound directly by GeoAlchemy2.
+"""
+
+# Property parcel (Manhattan area)
+PROPERTY_EWKT = "SRID=4326;POLYGON((-74.0059 40.7128, -74.0050 40.7128, -74.0050 40.7135, -74.0059 40.7135, -74.0059 40.7128))"
+
+# Neighbouring parcel just east of it
+PROPERTY_EAST_EWKT = "SRID=4326;POLYGON((-74.0049 40.7128, -74.0040 40.7128, -74.0040 40.7135, -74.0049 40.7135, -74.0049 40.7128))"
+
+# Zoning district containing the parcel, and one shifted west that overlaps it
+ZONING_EWKT = "SRID=4326;POLYGON((-74.0060 40.7120, -74.0040 40.7120, -74.0040 40.7140, -74.0060 40.7140, -74.0060 40.7120))"
+ZONING_WEST_EWKT = "SRID=4326;POLYGON((-74.0070 40.7120, -74.0050 40.7120, -74.0050 40.7140, -74.0070 40.7140, -74.0070 40.7120))"
+# Zoning district covering only the parcel's eastern third
+ZONING_PARTIAL_EWKT = "SRID=4326;POLYGON((-74.0053 40.7120, -74.0030 40.7120, -74.0030 40.7140, -74.0053 40.7140, -74.0053 40.7120))"
+
+# Landmark point inside the parcel
+LANDMARK_EWKT = "SRID=4326;POINT(-74.0055 40.7130)"
+
+# Landmark point off the parcel's north-east corner: inside the 150 ft bounding
+# search box, but ~60 m (~200 ft) away
+LANDMARK_CORNER_EWKT = "SRID=4326;POINT(-74.0045 40.7139)"
@@ -0,0 +1,110 @@
+"""
+Tests for geometry API endpoints.
+"""
+import orjson
+import pytest
+
+from app.models.zoning import ZoningDistrict, ZoningType
+from app.models.landmark import Landmark, LandmarkType
+from app.services.cache import ResponseCache, geometry_cache_key, nearby_geometry_cache_key
+from app.services.spatial import SpatialService
+from tests.geometries import ZONING_EWKT, LANDMARK_EWKT, LANDMARK_CORNER_EWKT
+
+
+@pytest.fixture
+def geometry_cache(monkeypatch):
+    """Fresh in-process cache for the geometry payloads."""
+    cache = ResponseCache()
+    monkeypatch.setattr("app.api.v1.endpoints.geometry.response_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def nearby_features(db_session, sample_property):
+    """Create a landmark inside the parcel, one just beyond 150 ft, and a covering district."""
+    db_session.add_all([
+        Landmark(
+            name="Inside Landmark",
+            landmark_type=LandmarkType.INDIVIDUAL,
+            geometry=LANDMARK_EWKT
+        ),
+        Landmark(
+            name="Corner Landmark",
+            landmark_type=LandmarkType.INDIVIDUAL,
+            geometry=LANDMARK_CORNER_EWKT
+        ),
+        ZoningDistrict(
+            zoning_code="R7-2",
+            zoning_type=ZoningType.RESIDENTIAL,
+            geometry=ZONING_EWKT
+        ),
+    ])
+    db_session.flush()
+    SpatialService(db_session).refresh_zoning_district_subdivisions()
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/api/v1/properties/9999999999/geometry", "/api/v1/properties/9999999999/nearby-geometry"],
+)
+def test_geometry_not_found(client, geometry_cache, path):
+    """Test geometry endpoints with a non-existent BBL."""
+    response = client.get(path)
+    
+    assert response.status_code == 404
+    assert "not found" in response.json()["detail"].lower()
+
+
+def test_get_property_geometry(client, geometry_cache, sample_property):
+    """Test property geometry, center and bbox, and that the body is cached."""
+    response = client.get(f"/api/v1/properties/{sample_property.bbl}/geometry")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["bbl"] == sample_property.bbl
+    assert orjson.loads(data["geometry"])["type"] == "Polygon"
+    assert data["center"]["lon"] == pytest.approx(-74.00545)
+    assert data["center"]["lat"] == pytest.approx(40.71315)
+    assert geometry_cache.get(geometry_cache_key(sample_property.bbl)) == response.content
+
+
+@pytest.mark.parametrize(
+    "path,key",
+    [
+        ("/api/v1/properties/9999999999/geometry", geometry_cache_key("9999999999")),
+        ("/api/v1/properties/9999999999/nearby-geometry", nearby_geometry_cache_key("9999999999", 150.0)),
+    ],
+)
+def test_geometry_cache_hit(client, geometry_cache, path, key):
+    """Test that cached bodies are served without touching the database."""
+    geometry_cache.set(key, b'{"cached":true}')
+    
+    response = client.get(path)
+    
+    assert response.status_code == 200
+    assert response.json() == {"cached": True}
+
+
+@pytest.mark.parametrize(
+    "precise,expected_landmarks",
+    [
+        (False, ["Inside Landmark", "Corner Landmark"]),
+        (True, ["Inside Landmark"]),
+    ],
+)
+def test_get_nearby_geometry(client, geometry_cache, sample_property, nearby_features, precise, expected_landmarks):
+    """Test bbox vs precise landmark matching near the distance boundary."""
+    response = client.get(
+        f"/api/v1/properties/{sample_property.bbl}/nearby-geometry",
+        params={"distance_feet": 150.0, "precise": precise}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["property"]["bbl"] == sample_property.bbl
+    assert [landmark["name"] for landmark in data["landmarks"]] == expected_landmarks
+    assert [zd["zoning_code"] for zd in data["zoning_districts"]] == ["R7-2"]
+    
+    # Each mode is cached under its own key
+    key = nearby_geometry_cache_key(sample_property.bbl, 150.0, precise)
+    assert geometry_cache.get(key) == response.content
@@ -2,69 +2,25 @@
 Tests for property API endpoints.
 """
 import pytest
-from geoalchemy2 import WKTElement
-from shapely.geometry import Point, Polygon
 
-from app.models.property import Property, Borough
 from app.models.zoning import ZoningDistrict, ZoningType
 from app.models.landmark import Landmark, LandmarkType
-
-
-@pytest.fixture
-def sample_property(db_session):
-    """Create a sample property for testing."""
-    # Create a simple polygon geometry (Manhattan area)
-    polygon = Polygon([
-        (-74.0059, 40.7128),
-        (-74.0050, 40.7128),
-        (-74.0050, 40.7135),
-        (-74.0059, 40.7135),
-        (-74.0059, 40.7128)
-    ])
-    
-    property_obj = Property(
-        bbl="1000120001",
-        address="123 Test St, Manhattan",
-        borough=Borough.MANHATTAN,
-        block=1,
-        lot=1,
-        geometry=WKTElement(polygon.wkt, srid=4326),
-        land_area=5000.0,
-        year_built=2000,
-        num_floors=5,
-        units_res=10,
-        units_total=10,
-        assessed_value=1000000.0
-    )
-    
-    db_session.add(property_obj)
-    db_session.commit()
-    db_session.refresh(property_obj)
-    
-    return property_obj
+from tests.geometries import ZONING_EWKT, LANDMARK_EWKT
 
 
 @pytest.fixture
 def sample_zoning_district(db_session):
     """Create a sample zoning district for testing."""
-    polygon = Polygon([
-        (-74.0060, 40.7120),
-        (-74.0040, 40.7120),
-        (-74.0040, 40.7140),
-        (-74.0060, 40.7140),
-        (-74.0060, 40.7120)
-    ])
-    
     zoning = ZoningDistrict(
         zoning_code="R7-2",
         zoning_type=ZoningType.RESIDENTIAL,
-        geometry=WKTElement(polygon.wkt, srid=4326),
+        geometry=ZONING_EWKT,
         far_residential=3.44,
         max_height=75.0
     )
     
     db_session.add(zoning)
-    db_session.commit()
+    db_session.flush()
     db_session.refresh(zoning)
     
     return zoning
@@ -73,16 +29,14 @@ def sample_zoning_district(db_session):
 @pytest.fixture
 def sample_landmark(db_session):
     """Create a sample landmark for testing."""
-    point = Point(-74.0055, 40.7130)
-    
     landmark = Landmark(
         name="Test Historic District",
         landmark_type=LandmarkType.HISTORIC_DISTRICT,
-        geometry=WKTElement(point.wkt, srid=4326)
+        geometry=LANDMARK_EWKT
     )
     
     db_session.add(landmark)
-    db_session.commit()
+    db_session.flush()
     db_session.refresh(landmark)
     
     return landmark
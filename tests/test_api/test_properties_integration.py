@@ -3,98 +3,67 @@ Integration tests for property API endpoints.
 Tests the full flow from API request to database response.
 """
 import pytest
-from geoalchemy2 import WKTElement
-from shapely.geometry import Point, Polygon
+from sqlalchemy import event, text
 
 from app.models.property import Property, Borough
 from app.models.zoning import ZoningDistrict, ZoningType, PropertyZoning
-from app.models.landmark import Landmark, LandmarkType
+from app.models.landmark import LandmarkType
+from app.services.cache import ResponseCache, address_cache_key
+from app.services.geocoding import AddressNotFoundError, geocoding_service
+from app.services.spatial import SpatialService
+from tests.geometries import PROPERTY_EWKT, ZONING_EWKT, ZONING_WEST_EWKT, LANDMARK_EWKT
 
 
 @pytest.fixture
-def sample_property_with_zoning(db_session):
+def sample_property_with_zoning(db_session, sample_property):
     """Create a sample property with zoning district relationship."""
-    # Create property
-    polygon = Polygon([
-        (-74.0059, 40.7128),
-        (-74.0050, 40.7128),
-        (-74.0050, 40.7135),
-        (-74.0059, 40.7135),
-        (-74.0059, 40.7128)
-    ])
-    
-    property_obj = Property(
-        bbl="1000120001",
-        address="123 Test St, Manhattan",
-        borough=Borough.MANHATTAN,
-        block=1,
-        lot=1,
-        geometry=WKTElement(polygon.wkt, srid=4326),
-        land_area=5000.0,
-        year_built=2000,
-        num_floors=5,
-        units_res=10,
-        units_total=10,
-        assessed_value=1000000.0
-    )
-    db_session.add(property_obj)
-    db_session.flush()
-    
     # Create zoning district
-    zoning_polygon = Polygon([
-        (-74.0060, 40.7120),
-        (-74.0040, 40.7120),
-        (-74.0040, 40.7140),
-        (-74.0060, 40.7140),
-        (-74.0060, 40.7120)
-    ])
-    
     zoning = ZoningDistrict(
         zoning_code="R7-2",
         zoning_type=ZoningType.RESIDENTIAL,
-        geometry=WKTElement(zoning_polygon.wkt, srid=4326),
+        geometry=ZONING_EWKT,
         far_residential=3.44,
         max_height=75.0
     )
-    db_session.add(zoning)
-    db_session.flush()
     
-    # Create relationship
+    # Create relationship (foreign keys are set from the objects in one flush)
     property_zoning = PropertyZoning(
-        property_id=property_obj.id,
-        zoning_district_id=zoning.id,
+        property=sample_property,
+        zoning_district=zoning,
         is_primary=True
     )
-    db_session.add(property_zoning)
-    db_session.commit()
-    db_session.refresh(property_obj)
+    db_session.add_all([zoning, property_zoning])
+    db_session.flush()
     
-    return property_obj
+    return sample_property
 
 
 @pytest.fixture
 def nearby_landmark(db_session, sample_property_with_zoning):
-    """Create a landmark near the property."""
-    # Create landmark point close to property
-    point = Point(-74.0055, 40.7130)
-    
-    landmark = Landmark(
-        name="Test Historic District",
-        landmark_type=LandmarkType.HISTORIC_DISTRICT,
-        geometry=WKTElement(point.wkt, srid=4326)
-    )
-    db_session.add(landmark)
-    db_session.commit()
-    db_session.refresh(landmark)
+    """Create a landmark near the property and return its id."""
+    # Plain INSERT; the test never needs the landmark as an ORM object
+    landmark_id = db_session.execute(
+        text(
+            "INSERT INTO landmarks (id, name, landmark_type, geometry) "
+            "VALUES (gen_random_uuid(), :name, :landmark_type, ST_GeomFromEWKT(:geometry)) "
+            "RETURNING id"
+        ),
+        {
+            "name": "Test Historic District",
+            "landmark_type": LandmarkType.HISTORIC_DISTRICT.name,
+            "geometry": LANDMARK_EWKT,
+        }
+    ).scalar_one()
     
-    return landmark
+    return landmark_id
 
 
-def test_property_lookup_with_zoning_and_landmarks(
-    client, sample_property_with_zoning, nearby_landmark
+@pytest.mark.asyncio
+async def test_property_lookup_with_zoning_and_landmarks(
+    async_client, db_session, sample_property_with_zoning, nearby_landmark
 ):
     """Test complete property lookup with zoning and landmarks."""
-    response = client.get(
+    response = await async_client.get(
         f"/api/v1/properties/lookup?bbl={sample_property_with_zoning.bbl}"
     )
     
@@ -107,29 +76,35 @@ def test_property_lookup_with_zoning_and_landmarks(
     assert data["property"]["zoning_districts"][0]["code"] == "R7-2"
     assert data["property"]["zoning_districts"][0]["is_primary"] is True
     assert len(data["property"]["nearby_landmarks"]) > 0
-
-
-def test_property_lookup_invalid_bbl(client):
-    """Test property lookup with invalid BBL."""
-    response = client.get("/api/v1/properties/lookup?bbl=9999999999")
     
-    assert response.status_code == 200
-    data = response.json()
-    assert data["property"] is None
-    assert data["error"] == "Property not found"
+    # The statement the lookup sends answers its landmark bounding-box prefilter
+    # from the GiST index (sequential scans off, since a one-row table is cheaper to scan)
+    query = SpatialService(db_session)._property_context_query(150.0).filter(
+        Property.bbl == sample_property_with_zoning.bbl
+    )
+    compiled = query.statement.compile(dialect=db_session.bind.dialect)
+    db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = "\n".join(
+        row[0] for row in db_session.connection().exec_driver_sql(
+            f"EXPLAIN {compiled}", compiled.params
+        )
+    )
+    assert "idx_landmarks_geometry" in plan
 
 
-def test_property_lookup_empty_params(client):
+@pytest.mark.asyncio
+async def test_property_lookup_empty_params(async_client):
     """Test property lookup with no parameters."""
-    response = client.get("/api/v1/properties/lookup")
+    response = await async_client.get("/api/v1/properties/lookup")
     
     assert response.status_code == 400
     assert "at least one" in response.json()["detail"].lower()
 
 
-def test_property_by_bbl_endpoint(client, sample_property_with_zoning):
+@pytest.mark.asyncio
+async def test_property_by_bbl_endpoint(async_client, sample_property_with_zoning):
     """Test direct BBL endpoint."""
-    response = client.get(f"/api/v1/properties/{sample_property_with_zoning.bbl}")
+    response = await async_client.get(f"/api/v1/properties/{sample_property_with_zoning.bbl}")
     
     assert response.status_code == 200
     data = response.json()
@@ -137,67 +112,153 @@ def test_property_by_bbl_endpoint(client, sample_property_with_zoning):
     assert data["address"] == sample_property_with_zoning.address
 
 
-def test_property_by_bbl_not_found(client):
-    """Test BBL endpoint with non-existent BBL."""
-    response = client.get("/api/v1/properties/9999999999")
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "path,expected_status,message_field",
+    [
+        ("/api/v1/properties/lookup?bbl=9999999999", 200, "error"),
+        ("/api/v1/properties/9999999999", 404, "detail"),
+    ],
+)
+async def test_property_not_found(async_client, path, expected_status, message_field):
+    """Test lookup and BBL endpoints with a non-existent BBL."""
+    response = await async_client.get(path)
     
-    assert response.status_code == 404
-    assert "not found" in response.json()["detail"].lower()
+    assert response.status_code == expected_status
+    data = response.json()
+    assert data.get("property") is None
+    assert "not found" in data[message_field].lower()
 
 
-def test_property_lookup_multiple_zoning_districts(client, db_session):
+@pytest.mark.asyncio
+async def test_property_lookup_multiple_zoning_districts(async_client, db_session):
     """Test property with multiple zoning districts."""
     # Create property
-    polygon = Polygon([
-        (-74.0059, 40.7128),
-        (-74.0050, 40.7128),
-        (-74.0050, 40.7135),
-        (-74.0059, 40.7135),
-        (-74.0059, 40.7128)
-    ])
-    
     property_obj = Property(
         bbl="1000120002",
         address="456 Test St, Manhattan",
         borough=Borough.MANHATTAN,
         block=2,
         lot=2,
-        geometry=WKTElement(polygon.wkt, srid=4326),
+        geometry=PROPERTY_EWKT,
     )
     db_session.add(property_obj)
     db_session.flush()
     
-    # Create multiple zoning districts
-    for i, code in enumerate(["R7-2", "C6-2"]):
-        zoning_polygon = Polygon([
-            (-74.0060 - i * 0.001, 40.7120),
-            (-74.0040 - i * 0.001, 40.7120),
-            (-74.0040 - i * 0.001, 40.7140),
-            (-74.0060 - i * 0.001, 40.7140),
-            (-74.0060 - i * 0.001, 40.7120)
-        ])
-        
-        zoning = ZoningDistrict(
-            zoning_code=code,
-            zoning_type=ZoningType.RESIDENTIAL if i == 0 else ZoningType.COMMERCIAL,
-            geometry=WKTElement(zoning_polygon.wkt, srid=4326),
-        )
-        db_session.add(zoning)
-        db_session.flush()
-        
-        property_zoning = PropertyZoning(
-            property_id=property_obj.id,
-            zoning_district_id=zoning.id,
-            is_primary=(i == 0)
-        )
-        db_session.add(property_zoning)
-    
-    db_session.commit()
+    # Create both zoning districts and their relationships in one statement
+    db_session.execute(
+        text(
+            "WITH districts AS ("
+            "    INSERT INTO zoning_districts (id, zoning_code, zoning_type, geometry) VALUES "
+            "    (gen_random_uuid(), :primary_code, :primary_type, ST_GeomFromEWKT(:primary_geometry)), "
+            "    (gen_random_uuid(), :other_code, :other_type, ST_GeomFromEWKT(:other_geometry)) "
+            "    RETURNING id, zoning_code"
+            ") "
+            "INSERT INTO property_zoning (id, property_id, zoning_district_id, is_primary) "
+            "SELECT gen_random_uuid(), CAST(:property_id AS uuid), id, zoning_code = :primary_code "
+            "FROM districts"
+        ),
+        {
+            "property_id": str(property_obj.id),
+            "primary_code": "R7-2",
+            "primary_type": ZoningType.RESIDENTIAL.name,
+            "primary_geometry": ZONING_EWKT,
+            "other_code": "C6-2",
+            "other_type": ZoningType.COMMERCIAL.name,
+            "other_geometry": ZONING_WEST_EWKT,
+        }
+    )
     
     # Test lookup
-    response = client.get(f"/api/v1/properties/lookup?bbl={property_obj.bbl}")
+    response = await async_client.get(f"/api/v1/properties/lookup?bbl={property_obj.bbl}")
     
     assert response.status_code == 200
     data = response.json()
     assert len(data["property"]["zoning_districts"]) == 2
     assert any(zd["is_primary"] for zd in data["property"]["zoning_districts"])
+
+
+@pytest.mark.asyncio
+async def test_property_lookup_statement_count(async_client, db_session, sample_property_with_zoning):
+    """Test that a lookup loads the property, zoning and landmarks without N+1 queries."""
+    statements = []
+    engine = db_session.get_bind().engine
+    
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        response = await async_client.get(
+            f"/api/v1/properties/lookup?bbl={sample_property_with_zoning.bbl}"
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    
+    assert response.status_code == 200
+    assert len(response.json()["property"]["zoning_districts"]) == 1
+    # Savepoint bookkeeping from the rolled-back test transaction is not a query
+    assert len([st for st in statements if "SAVEPOINT" not in st]) <= 3
+
+
+@pytest.fixture
+def lookup_cache(monkeypatch):
+    """Fresh in-process cache for address, geocode and coordinate keys."""
+    cache = ResponseCache()
+    monkeypatch.setattr("app.api.v1.endpoints.properties.lookup_cache", cache)
+    monkeypatch.setattr("app.services.spatial.lookup_cache", cache)
+    monkeypatch.setattr(geocoding_service, "cache", cache)
+    return cache
+
+
+@pytest.fixture
+def geocoder_calls(monkeypatch, lookup_cache):
+    """Stub the geocoder: "Geocoded" addresses resolve inside the sample parcel, others don't match."""
+    calls = []
+    
+    async def fake_geocode_nyc(address):
+        calls.append(address)
+        if "Geocoded" in address:
+            return (40.7130, -74.0055)
+        raise AddressNotFoundError(f"No results found for address: {address}")
+    
+    monkeypatch.setattr(geocoding_service, "provider", "nyc")
+    monkeypatch.setattr(geocoding_service, "_geocode_nyc", fake_geocode_nyc)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_bulk_lookup(async_client, sample_property_with_zoning, lookup_cache, geocoder_calls):
+    """Test bulk lookup through the cached, direct-match and geocode phases, in request order."""
+    bbl = sample_property_with_zoning.bbl
+    lookup_cache.set(address_cache_key("55 Cached Rd, New York, NY"), bbl.encode())
+    
+    response = await async_client.post(
+        "/api/v1/properties/bulk-lookup",
+        json={"addresses": ["9 Nowhere Ave", "123 Test St", "1 Geocoded Pl", "55 Cached Rd"]}
+    )
+    
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["property"] and r["property"]["bbl"] for r in results] == [None, bbl, bbl, bbl]
+    assert results[0]["error"] == "Property not found"
+    assert results[1]["property"]["zoning_districts"][0]["code"] == "R7-2"
+    
+    # Only addresses without a cached or direct match reach the geocoder
+    assert sorted(geocoder_calls) == ["1 Geocoded Pl, New York, NY", "9 Nowhere Ave, New York, NY"]
+    
+    # Resolved addresses are cached for the next lookup
+    assert lookup_cache.get(address_cache_key("1 Geocoded Pl, New York, NY")) == bbl.encode()
+    assert lookup_cache.get(address_cache_key("123 Test St, New York, NY")) == bbl.encode()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [0, 101])
+async def test_bulk_lookup_address_count_validation(async_client, count):
+    """Test that bulk lookups need between 1 and 100 addresses."""
+    response = await async_client.post(
+        "/api/v1/properties/bulk-lookup",
+        json={"addresses": [f"{n} Broadway" for n in range(count)]}
+    )
+    
+    assert response.status_code == 422
@@ -0,0 +1,77 @@
+"""
+Latency benchmarks for the nearby-landmark query and the lookup endpoint.
+Run with pytest-benchmark; compare against a saved baseline to catch query-plan
+regressions (a lost index or bounding-box prefilter shows up as a slowdown).
+The absolute p95 budgets depend on the machine, so they are only asserted
+with --check-latency.
+"""
+import math
+
+import pytest
+from sqlalchemy import text
+
+from app.models.landmark import LandmarkType
+from app.services.spatial import SpatialService
+
+pytest.importorskip("pytest_benchmark")
+
+
+# Number of landmarks seeded around the parcel
+LANDMARK_COUNT = 10_000
+
+# 95th-percentile latency budgets, in seconds
+NEARBY_LANDMARKS_P95 = 0.05
+LOOKUP_P95 = 0.1
+
+
+def p95(benchmark) -> float:
+    """95th-percentile round time of a finished benchmark (nearest rank)."""
+    timings = sorted(benchmark.stats.stats.data)
+    return timings[max(math.ceil(len(timings) * 0.95) - 1, 0)]
+
+
+@pytest.fixture
+def check_latency(request) -> bool:
+    """Whether the absolute p95 budgets are asserted (--check-latency)."""
+    return request.config.getoption("--check-latency")
+
+
+@pytest.fixture
+def many_landmarks(db_session, sample_property):
+    """Seed a 100 x 100 grid of landmark points (~50 m apart) around the sample property."""
+    db_session.execute(
+        text(
+            "INSERT INTO landmarks (id, name, landmark_type, geometry) "
+            "SELECT gen_random_uuid(), 'Landmark ' || n, :landmark_type, "
+            "       ST_SetSRID(ST_MakePoint(-74.0300 + (n % 100) * 0.0005, "
+            "                               40.6930 + (n / 100) * 0.0005), 4326) "
+            "FROM generate_series(0, :count - 1) AS n"
+        ),
+        {"count": LANDMARK_COUNT, "landmark_type": LandmarkType.INDIVIDUAL.name}
+    )
+    db_session.execute(text("ANALYZE landmarks"))
+
+
+@pytest.mark.benchmark(group="spatial")
+def test_bench_find_nearby_landmarks(
+    benchmark, check_latency, db_session, sample_property, many_landmarks
+):
+    """Benchmark find_nearby_landmarks against 10k landmarks."""
+    service = SpatialService(db_session)
+    
+    landmarks = benchmark(service.find_nearby_landmarks, sample_property.geometry, 150.0)
+    
+    assert len(landmarks) > 0
+    if check_latency and benchmark.stats is not None:
+        assert p95(benchmark) < NEARBY_LANDMARKS_P95
+
+
+@pytest.mark.benchmark(group="api")
+def test_bench_property_lookup(benchmark, check_latency, client, sample_property, many_landmarks):
+    """Benchmark /properties/lookup by BBL against 10k landmarks."""
+    response = benchmark(client.get, f"/api/v1/properties/lookup?bbl={sample_property.bbl}")
+    
+    assert response.status_code == 200
+    assert response.json()["property"] is not None
+    if check_latency and benchmark.stats is not None:
+        assert p95(benchmark) < LOOKUP_P95
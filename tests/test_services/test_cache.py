@@ -0,0 +1,90 @@
+"""
+Tests for response cache.
+"""
+from app.services.cache import (
+    ResponseCache,
+    address_cache_key,
+    coordinate_cache_key,
+    geometry_cache_key,
+    nearby_geometry_cache_key,
+)
+
+
+def test_cache_set_and_get():
+    """Test storing and retrieving a value."""
+    cache = ResponseCache()
+    
+    assert cache.get("geom:1000120001") is None
+    
+    cache.set("geom:1000120001", b'{"bbl": "1000120001"}')
+    assert cache.get("geom:1000120001") == b'{"bbl": "1000120001"}'
+
+
+def test_cache_expired_entry():
+    """Test that expired entries are treated as misses."""
+    cache = ResponseCache(ttl_seconds=-1)
+    
+    cache.set("geom:1000120001", b"{}")
+    assert cache.get("geom:1000120001") is None
+
+
+def test_cache_per_key_ttl():
+    """Test that a per-key TTL overrides the cache default."""
+    cache = ResponseCache()
+    
+    cache.set(address_cache_key("123 Main St"), b"1000120001", ttl_seconds=-1)
+    assert cache.get(address_cache_key("123 MAIN ST")) is None
+    
+    cache.set(address_cache_key("123 Main St"), b"1000120001", ttl_seconds=60)
+    assert cache.get(address_cache_key("123 MAIN ST")) == b"1000120001"
+
+
+def test_cache_caps_in_process_ttl():
+    """Test that in-process TTLs are capped at local_max_ttl_seconds."""
+    cache = ResponseCache(local_max_ttl_seconds=-1)
+    
+    cache.set(address_cache_key("123 Main St"), b"1000120001", ttl_seconds=30 * 86400)
+    assert cache.get(address_cache_key("123 Main St")) is None
+
+
+def test_cache_evicts_oldest_entry():
+    """Test that the oldest entry is evicted when the cache is full."""
+    cache = ResponseCache(max_entries=2)
+    
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.get("a")
+    cache.set("c", b"3")
+    
+    assert cache.get("a") == b"1"
+    assert cache.get("b") is None
+    assert cache.get("c") == b"3"
+
+
+def test_cache_delete_and_delete_prefix():
+    """Test removing keys individually and by prefix."""
+    cache = ResponseCache()
+    cache.set(geometry_cache_key("1000120001"), b"{}")
+    cache.set(nearby_geometry_cache_key("1000120001", 150.0), b"{}")
+    cache.set(nearby_geometry_cache_key("1000120002", 150.0), b"{}")
+    
+    cache.delete(geometry_cache_key("1000120001"))
+    assert cache.get(geometry_cache_key("1000120001")) is None
+    
+    cache.delete_prefix("nearby:")
+    assert cache.get(nearby_geometry_cache_key("1000120001", 150.0)) is None
+    assert cache.get(nearby_geometry_cache_key("1000120002", 150.0)) is None
+
+
+def test_coordinate_cache_key_buckets_nearby_points():
+    """Test that points a few meters apart share a coordinate bucket."""
+    assert coordinate_cache_key(40.71301, -74.00551) == coordinate_cache_key(40.71299, -74.00549)
+    assert coordinate_cache_key(40.7130, -74.0055) != coordinate_cache_key(40.7140, -74.0055)
+
+
+def test_cache_unreachable_redis_is_a_miss():
+    """Test that an unreachable Redis fails fast and is treated as a miss."""
+    cache = ResponseCache("redis://127.0.0.1:1/0", socket_timeout=0.1, socket_connect_timeout=0.1)
+    
+    cache.set("geom:1000120001", b"{}")
+    assert cache.get("geom:1000120001") is None
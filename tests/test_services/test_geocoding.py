@@ -1,19 +1,30 @@
 """
 Tests for geocoding service.
 """
+import asyncio
+
+import httpx
 import pytest
-from app.services.geocoding import GeocodingService, GeocodingError
+from app.services.cache import ResponseCache
+from app.services.geocoding import GeocodingService, GeocodingError, AddressNotFoundError, _normalize_address
 
 
-def test_geocoding_service_initialization():
-    """Test geocoding service can be initialized."""
+@pytest.fixture(scope="module")
+def geocoding_service():
+    """GeocodingService shared by the tests that don't modify it."""
     service = GeocodingService()
-    assert service.provider in ["nyc", "google"]
+    yield service
+    asyncio.run(service.aclose())
+
+
+def test_geocoding_service_initialization(geocoding_service):
+    """Test geocoding service can be initialized."""
+    assert geocoding_service.provider in ["nyc", "google"]
 
 
-def test_normalize_address():
+def test_normalize_address(geocoding_service):
     """Test address normalization."""
-    service = GeocodingService()
+    service = geocoding_service
     
     # Test basic normalization
     normalized = service.normalize_address("123 Main St")
@@ -24,6 +35,18 @@ def test_normalize_address():
     assert normalized2 == "123 Main St, New York, NY"
 
 
+def test_normalize_address_cached(geocoding_service):
+    """Test that repeat addresses are normalized from the memo cache."""
+    _normalize_address.cache_clear()
+    
+    first = geocoding_service.normalize_address("1 Centre St")
+    second = geocoding_service.normalize_address("1 Centre St")
+    
+    assert first == second == "1 Centre St, New York, NY"
+    assert _normalize_address.cache_info().hits == 1
+
+
+@pytest.mark.network
 @pytest.mark.asyncio
 async def test_geocode_nyc_address():
     """Test geocoding with NYC geocoding API."""
@@ -41,6 +64,7 @@ async def test_geocode_nyc_address():
         pytest.skip("Geocoding API unavailable")
 
 
+@pytest.mark.network
 @pytest.mark.asyncio
 async def test_geocode_invalid_address():
     """Test geocoding with invalid address."""
@@ -51,7 +75,189 @@ async def test_geocode_invalid_address():
         await service.geocode("This is not a real address 12345")
 
 
-def test_geocoding_error():
-    """Test GeocodingError exception."""
-    error = GeocodingError("Test error")
+def mock_nyc_geocoder(service, status_code=200, json=None):
+    """Route the service's HTTP client to a canned Census geocoder response."""
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(status_code, json=json)
+    
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return requests
+
+
+@pytest.mark.asyncio
+async def test_geocode_nyc_parses_response():
+    """Test parsing a Census geocoder match."""
+    service = GeocodingService(cache=ResponseCache())
+    service.provider = "nyc"
+    requests = mock_nyc_geocoder(service, json={
+        "result": {"addressMatches": [{"coordinates": {"x": -73.9857, "y": 40.7484}}]}
+    })
+    
+    assert await service.geocode("350 5th Ave") == (40.7484, -73.9857)
+    assert requests[0].url.host == "geocoding.geo.census.gov"
+    assert requests[0].url.params["street"] == "350 5th Ave, New York, NY"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "status_code,json,error_class",
+    [
+        (200, {"result": {"addressMatches": []}}, AddressNotFoundError),
+        (200, {"result": {"addressMatches": [{"coordinates": {}}]}}, GeocodingError),
+        (503, {}, GeocodingError),
+    ],
+)
+async def test_geocode_nyc_errors(status_code, json, error_class):
+    """Test no-match, malformed and HTTP error responses from the Census geocoder."""
+    service = GeocodingService(cache=ResponseCache())
+    service.provider = "nyc"
+    mock_nyc_geocoder(service, status_code=status_code, json=json)
+    
+    with pytest.raises(error_class):
+        await service.geocode("350 5th Ave")
+
+
+@pytest.mark.asyncio
+async def test_geocode_uses_cache():
+    """Test that repeat addresses are served from the cache."""
+    service = GeocodingService(cache=ResponseCache())
+    service.provider = "nyc"
+    calls = []
+    
+    async def fake_geocode_nyc(address):
+        calls.append(address)
+        return (40.7484, -73.9857)
+    
+    service._geocode_nyc = fake_geocode_nyc
+    
+    assert await service.geocode("350 5th Ave") == (40.7484, -73.9857)
+    assert await service.geocode("350  5th Ave") == (40.7484, -73.9857)
+    assert calls == ["350 5th Ave, New York, NY"]
+
+
+@pytest.mark.asyncio
+async def test_geocode_caches_not_found():
+    """Test that addresses with no match are cached as misses."""
+    service = GeocodingService(cache=ResponseCache())
+    service.provider = "nyc"
+    calls = []
+    
+    async def fake_geocode_nyc(address):
+        calls.append(address)
+        raise AddressNotFoundError(f"No results found for address: {address}")
+    
+    service._geocode_nyc = fake_geocode_nyc
+    
+    with pytest.raises(AddressNotFoundError):
+        await service.geocode("This is not a real address 12345")
+    with pytest.raises(AddressNotFoundError):
+        await service.geocode("This is not a real address 12345")
+    assert len(calls) == 1
+
+
+class AsyncOnlyCache(ResponseCache):
+    """In-process cache that fails if the blocking get/set are used."""
+    
+    async def aget(self, key):
+        return ResponseCache.get(self, key)
+    
+    async def aset(self, key, value, ttl_seconds=None):
+        ResponseCache.set(self, key, value, ttl_seconds=ttl_seconds)
+    
+    def get(self, key):
+        raise AssertionError("blocking cache get on the event loop")
+    
+    def set(self, key, value, ttl_seconds=None):
+        raise AssertionError("blocking cache set on the event loop")
+
+
+@pytest.mark.asyncio
+async def test_geocode_uses_async_cache():
+    """Test that geocode and geocode_many only use the non-blocking cache calls."""
+    service = GeocodingService(cache=AsyncOnlyCache())
+    service.provider = "nyc"
+    
+    async def fake_geocode_nyc(address):
+        return (40.7484, -73.9857)
+    
+    service._geocode_nyc = fake_geocode_nyc
+    
+    assert await service.geocode("350 5th Ave") == (40.7484, -73.9857)
+    assert await service.geocode_many(["350 5th Ave", "1 Wall St"]) == [(40.7484, -73.9857)] * 2
+
+
+@pytest.mark.asyncio
+async def test_geocode_many():
+    """Test concurrent geocoding keeps input order and skips cached addresses."""
+    service = GeocodingService(cache=ResponseCache())
+    service.provider = "nyc"
+    calls = []
+    
+    async def fake_geocode_nyc(address):
+        calls.append(address)
+        if address.startswith("Nowhere"):
+            raise AddressNotFoundError(f"No results found for address: {address}")
+        return (40.7484, -73.9857)
+    
+    service._geocode_nyc = fake_geocode_nyc
+    await service.geocode("350 5th Ave")
+    
+    results = await service.geocode_many(["Nowhere", "350 5th Ave", "1 Wall St", "1 Wall St"])
+    assert results == [None, (40.7484, -73.9857), (40.7484, -73.9857), (40.7484, -73.9857)]
+    assert sorted(calls) == ["1 Wall St, New York, NY", "350 5th Ave, New York, NY", "Nowhere, New York, NY"]
+
+
+@pytest.mark.asyncio
+async def test_geocode_many_reads_cache_once_per_address():
+    """Test that misses found by the batched cache probe are not looked up again."""
+    cache = ResponseCache()
+    reads = []
+    cache_get = cache.get
+    cache.get = lambda key: reads.append(key) or cache_get(key)
+    service = GeocodingService(cache=cache)
+    service.provider = "nyc"
+    
+    async def fake_geocode_nyc(address):
+        return (40.7484, -73.9857)
+    
+    service._geocode_nyc = fake_geocode_nyc
+    
+    await service.geocode_many(["350 5th Ave", "1 Wall St", "1 Wall St"])
+    assert sorted(reads) == ["geo:1 wall st, new york, ny", "geo:350 5th ave, new york, ny"]
+
+
+@pytest.mark.asyncio
+async def test_geocode_many_batched():
+    """Test that geocode_many keeps up to `concurrency` provider requests in flight."""
+    service = GeocodingService(cache=ResponseCache(max_entries=1000))
+    service.provider = "nyc"
+    in_flight = 0
+    max_in_flight = 0
+    
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={
+            "result": {"addressMatches": [{"coordinates": {"x": -73.9857, "y": 40.7484}}]}
+        })
+    
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    
+    results = await service.geocode_many([f"{n} Broadway" for n in range(1, 101)], concurrency=20)
+    
+    assert results == [(40.7484, -73.9857)] * 100
+    assert max_in_flight == 20
+
+
+@pytest.mark.parametrize("error_class", [GeocodingError, AddressNotFoundError])
+def test_geocoding_error(error_class):
+    """Test geocoding exceptions."""
+    error = error_class("Test error")
     assert str(error) == "Test error"
+    assert isinstance(error, GeocodingError)
@@ -2,41 +2,13 @@
 Tests for spatial service.
 """
 import pytest
-from geoalchemy2 import WKTElement
-from shapely.geometry import Point, Polygon
+from sqlalchemy import text
 
 from app.models.property import Property, Borough
-from app.models.zoning import ZoningDistrict, ZoningType
+from app.models.zoning import ZoningDistrict, ZoningType, PropertyZoning
 from app.models.landmark import Landmark, LandmarkType
 from app.services.spatial import SpatialService
-
-
-@pytest.fixture
-def sample_property(db_session):
-    """Create a sample property for testing."""
-    polygon = Polygon([
-        (-74.0059, 40.7128),
-        (-74.0050, 40.7128),
-        (-74.0050, 40.7135),
-        (-74.0059, 40.7135),
-        (-74.0059, 40.7128)
-    ])
-    
-    property_obj = Property(
-        bbl="1000120001",
-        address="123 Test St, Manhattan",
-        borough=Borough.MANHATTAN,
-        block=1,
-        lot=1,
-        geometry=WKTElement(polygon.wkt, srid=4326),
-        land_area=5000.0
-    )
-    
-    db_session.add(property_obj)
-    db_session.commit()
-    db_session.refresh(property_obj)
-    
-    return property_obj
+from tests.geometries import PROPERTY_EAST_EWKT, ZONING_EWKT, ZONING_PARTIAL_EWKT, LANDMARK_EWKT
 
 
 def test_find_property_by_bbl(db_session, sample_property):
@@ -49,6 +21,33 @@ def test_find_property_by_bbl(db_session, sample_property):
     assert property_obj.bbl == "1000120001"
 
 
+def test_find_property_by_bbl_plan(db_session, sample_property):
+    """Test that BBL lookups are answered from an index, not a table scan."""
+    # A one-row table is cheaper to scan; rule that out so the plan shows index support
+    db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    
+    plan = db_session.execute(
+        text("EXPLAIN (FORMAT JSON) SELECT * FROM properties WHERE bbl = :bbl"),
+        {"bbl": sample_property.bbl}
+    ).scalar_one()[0]
+    
+    assert plan["Plan"]["Node Type"] in ("Index Scan", "Bitmap Heap Scan")
+
+
+@pytest.mark.parametrize(
+    "index_name",
+    ["idx_zoning_districts_geometry", "idx_zoning_district_subdivisions_geometry"],
+)
+def test_zoning_geometry_index_is_spgist(db_session, index_name):
+    """Test that zoning geometries are indexed with SP-GiST."""
+    indexdef = db_session.execute(
+        text("SELECT indexdef FROM pg_indexes WHERE indexname = :index_name"),
+        {"index_name": index_name}
+    ).scalar_one()
+    
+    assert "USING spgist" in indexdef
+
+
 def test_find_property_by_bbl_not_found(db_session):
     """Test finding property by BBL that doesn't exist."""
     service = SpatialService(db_session)
@@ -69,20 +68,156 @@ def test_find_property_by_coordinates(db_session, sample_property):
     assert property_obj.bbl == sample_property.bbl
 
 
+def test_get_property_with_context_at(db_session, sample_property):
+    """Test finding a property with its context by coordinates."""
+    service = SpatialService(db_session)
+    
+    context = service.get_property_with_context_at(40.7130, -74.0055)
+    
+    assert context is not None
+    property_obj, zoning_districts, landmarks = context
+    assert property_obj.bbl == sample_property.bbl
+    assert isinstance(zoning_districts, list)
+    assert isinstance(landmarks, list)
+
+
+def test_get_properties_with_context(db_session, sample_property):
+    """Test loading several properties with their context, skipping missing BBLs."""
+    east = Property(
+        bbl="1000120002",
+        address="125 Test St, Manhattan",
+        borough=Borough.MANHATTAN,
+        block=1,
+        lot=2,
+        geometry=PROPERTY_EAST_EWKT
+    )
+    db_session.add(east)
+    db_session.flush()
+    
+    service = SpatialService(db_session)
+    contexts = service.get_properties_with_context(
+        [sample_property.bbl, "9999999999", east.bbl, sample_property.bbl]
+    )
+    
+    assert set(contexts) == {sample_property.bbl, east.bbl}
+    for bbl, (property_obj, zoning_districts, landmarks) in contexts.items():
+        assert property_obj.bbl == bbl
+        assert isinstance(zoning_districts, list)
+        assert isinstance(landmarks, list)
+    assert SpatialService(db_session).get_properties_with_context([]) == {}
+
+
+def test_find_bbls_by_coordinates(db_session, sample_property):
+    """Test finding several properties by coordinates in one query."""
+    service = SpatialService(db_session)
+    
+    bbls = service.find_bbls_by_coordinates([(40.7130, -74.0055), (40.0, -75.0)])
+    
+    assert bbls == [sample_property.bbl, None]
+
+
 def test_find_nearby_landmarks(db_session, sample_property):
     """Test finding nearby landmarks."""
     # Create a landmark close to the property
-    point = Point(-74.0055, 40.7130)  # Inside property polygon
     landmark = Landmark(
         name="Nearby Landmark",
         landmark_type=LandmarkType.INDIVIDUAL,
-        geometry=WKTElement(point.wkt, srid=4326)
+        geometry=LANDMARK_EWKT
     )
     db_session.add(landmark)
-    db_session.commit()
+    db_session.flush()
     
     service = SpatialService(db_session)
     landmarks = service.find_nearby_landmarks(sample_property.geometry, distance_feet=150.0)
     
     assert len(landmarks) > 0
     assert any(lm.name == "Nearby Landmark" for lm, _ in landmarks)
+
+
+def test_find_nearby_landmarks_closest_first(db_session, sample_property):
+    """Test that nearby landmarks are ordered by distance and limited."""
+    db_session.add_all([
+        Landmark(
+            name="Nearby Landmark",
+            landmark_type=LandmarkType.INDIVIDUAL,
+            geometry=LANDMARK_EWKT
+        ),
+        Landmark(
+            name="Farther Landmark",
+            landmark_type=LandmarkType.INDIVIDUAL,
+            geometry="SRID=4326;POINT(-74.0049 40.7136)"
+        ),
+    ])
+    db_session.flush()
+    
+    service = SpatialService(db_session)
+    landmarks = service.find_nearby_landmarks(sample_property.geometry, distance_feet=150.0, limit=1)
+    
+    assert [lm.name for lm, _ in landmarks] == ["Nearby Landmark"]
+
+
+@pytest.fixture
+def overlapping_zoning_districts(db_session):
+    """Create a district covering the sample parcel and one overlapping a third of it."""
+    covering = ZoningDistrict(
+        zoning_code="R7-2",
+        zoning_type=ZoningType.RESIDENTIAL,
+        geometry=ZONING_EWKT
+    )
+    partial = ZoningDistrict(
+        zoning_code="C6-2",
+        zoning_type=ZoningType.COMMERCIAL,
+        geometry=ZONING_PARTIAL_EWKT
+    )
+    db_session.add_all([covering, partial])
+    db_session.flush()
+    
+    return covering, partial
+
+
+def zoning_relationships(db_session, property_obj):
+    """Map zoning code to is_primary for a property's PropertyZoning rows."""
+    rows = (
+        db_session.query(ZoningDistrict.zoning_code, PropertyZoning.is_primary)
+        .join(PropertyZoning, PropertyZoning.zoning_district_id == ZoningDistrict.id)
+        .filter(PropertyZoning.property_id == property_obj.id)
+        .all()
+    )
+    assert len(rows) == len({code for code, _ in rows}), "duplicate relationships"
+    return dict(rows)
+
+
+def test_create_property_zoning_relationships(db_session, sample_property, overlapping_zoning_districts):
+    """Test that the largest overlap is primary and a re-run adds nothing."""
+    service = SpatialService(db_session)
+    
+    service.create_property_zoning_relationships(sample_property)
+    assert zoning_relationships(db_session, sample_property) == {"R7-2": True, "C6-2": False}
+    
+    service.create_property_zoning_relationships(sample_property)
+    assert zoning_relationships(db_session, sample_property) == {"R7-2": True, "C6-2": False}
+
+
+def test_create_property_zoning_relationships_keeps_existing_primary(
+    db_session, sample_property, overlapping_zoning_districts
+):
+    """Test that a property's existing primary district is not replaced."""
+    _, partial = overlapping_zoning_districts
+    db_session.add(PropertyZoning(property=sample_property, zoning_district=partial, is_primary=True))
+    db_session.flush()
+    
+    SpatialService(db_session).create_property_zoning_relationships(sample_property)
+    
+    assert zoning_relationships(db_session, sample_property) == {"R7-2": False, "C6-2": True}
+
+
+def test_bulk_create_property_zoning_relationships(db_session, sample_property, overlapping_zoning_districts):
+    """Test bulk creation from subdivisions, and that a re-run skips processed properties."""
+    service = SpatialService(db_session)
+    service.refresh_zoning_district_subdivisions()
+    
+    assert service.bulk_create_property_zoning_relationships([sample_property.id]) == 2
+    assert zoning_relationships(db_session, sample_property) == {"R7-2": True, "C6-2": False}
+    
+    assert service.bulk_create_property_zoning_relationships() == 0
+    assert zoning_relationships(db_session, sample_property) == {"R7-2": True, "C6-2": False}